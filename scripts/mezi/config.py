@@ -5,35 +5,64 @@
 # Dependencies: environment.yml
 # Python Version: 3.12+
 
-import json
 import os
+import pathlib
 import shlex
 import subprocess
+import time
+import zipfile
 from collections.abc import Iterable
+from typing import Any
 
 import geopandas as gpd
+import orjson
 import pandas as pd
+import pyarrow as pa
+from geopandas.io.arrow import _arrow_to_geopandas  # pyright: ignore [reportPrivateUsage, reportUnknownVariableType]
+from osgeo import gdal
 
 from mezi.utils import config, misc
 
+gdal.UseExceptions()
+# inherited by both the in-process gdal fast path and the shelled-out gdal utilities
+os.environ.setdefault("GDAL_NUM_THREADS", "ALL_CPUS")
+
 
 class DownloadConfig(config.Config):
+    # path roots composed once at class-body evaluation, deleted below so they stay out of the config defaults
+    _data = pathlib.PurePath("..", "data")
+    _basedata = pathlib.PurePath("..", "basedata")
+    _csv = _basedata / "csv"
+
     PRINT_PROGRESS_BAR = True
     PRINT_CMD = False
 
+    INDEX_TTL_SEC = 3600
+    FGB_CACHE = True
+    DOWNLOAD_PREFETCH_DEPTH = 8
+    DOWNLOAD_MAX_WORKERS = 16
+    # whole download stages in flight at once, 1 falls back to the old serial order
+    DOWNLOAD_STAGE_MAX_WORKERS = 8
+    RUN_TILES = 0
+    RUN_TILE_OVERLAP = 100
+
     OUTPUT_ZIP_PATH = os.path.join("..", "data.zip")
-    OUTPUT_ZIP_CONFIG_PATH = os.path.join("..", "data", "config")
+    OUTPUT_ZIP_CONFIG_PATH = str(_data / "config")
     OUTPUT_FILES_TO_ZIP = []
+    # already-compressed rasters and point clouds gain nothing from deflate, store them as-is
+    OUTPUT_ZIP_COMPRESSION_BY_EXT = {".tif": zipfile.ZIP_STORED, ".las": zipfile.ZIP_STORED, ".laz": zipfile.ZIP_STORED, ".7z": zipfile.ZIP_STORED, ".zip": zipfile.ZIP_STORED}
+    # level 1 is ~2x faster than the zlib default on the remaining gpkg/json members for ~1% size, raise for archival runs
+    OUTPUT_ZIP_COMPRESS_LEVEL = 1
 
     LGIA_LAS_DOWNLOAD = True
-    LGIA_LAS_CACHE_PATH = os.path.join("..", "data", "lgia", "las")
+    LGIA_LAS_CACHE_PATH = str(_data / "lgia" / "las")
     LGIA_LAS_CACHE_FORCE_INVALIDATE = False
     LGIA_LAS_PATH_HEAD = "https://s3.storage.pub.lvdc.gov.lv/lgia-opendata/las"
-    LGIA_LAS_PATH_TAIL_NOMENKLATURA_GPKG_PATH = os.path.join("..", "basedata", "nomenklaturas.gpkg")
+    LGIA_LAS_PATH_TAIL_NOMENKLATURA_GPKG_PATH = str(_basedata / "nomenklaturas.gpkg")
     LGIA_LAS_PATH_TAIL_NOMENKLATURA_LAYER = "tks1_1000"
     LGIA_LAS_PATH_TAIL_NOMENKLATURA_FIELD = "numurs"
 
-    LGIA_TIF_CACHE_PATH = os.path.join("..", "data", "lgia", "tif")
+    LGIA_TIF_CACHE_PATH = str(_data / "lgia" / "tif")
     LGIA_TIF_CACHE_FORCE_INVALIDATE = False
     LGIA_TIF_DTM = True
     LGIA_TIF_TRI = True
@@ -49,40 +78,45 @@ class DownloadConfig(config.Config):
 
     LGIA_ORTO_RGB_DOWNLOAD_TIF = False
     LGIA_ORTO_RGB_DOWNLOAD_TFW = False
-    LGIA_ORTO_RGB_CACHE_PATH = os.path.join("..", "data", "lgia", "orto", "rgb")
+    LGIA_ORTO_RGB_CACHE_PATH = str(_data / "lgia" / "orto" / "rgb")
     LGIA_ORTO_RGB_CACHE_FORCE_INVALIDATE = False
     LGIA_ORTO_RGB_PATH_HEAD = "https://s3.storage.pub.lvdc.gov.lv/lgia-opendata/ortofoto_rgb_v6"
-    LGIA_ORTO_RGB_PATH_TAIL_NOMENKLATURA_GPKG_PATH = os.path.join("..", "basedata", "nomenklaturas.gpkg")
+    LGIA_ORTO_RGB_PATH_TAIL_NOMENKLATURA_GPKG_PATH = str(_basedata / "nomenklaturas.gpkg")
     LGIA_ORTO_RGB_PATH_TAIL_NOMENKLATURA_LAYER = "tks1_5000"
     LGIA_ORTO_RGB_PATH_TAIL_NOMENKLATURA_FIELD = "numurs"
 
     LGIA_ORTO_CIR_DOWNLOAD_TIF = False
     LGIA_ORTO_CIR_DOWNLOAD_TFW = False
-    LGIA_ORTO_CIR_CACHE_PATH = os.path.join("..", "data", "lgia", "orto", "cir")
+    LGIA_ORTO_CIR_CACHE_PATH = str(_data / "lgia" / "orto" / "cir")
     LGIA_ORTO_CIR_CACHE_FORCE_INVALIDATE = False
     LGIA_ORTO_CIR_PATH_HEAD = "https://s3.storage.pub.lvdc.gov.lv/lgia-opendata/ortofoto_cir_v6"
-    LGIA_ORTO_CIR_PATH_TAIL_NOMENKLATURA_GPKG_PATH = os.path.join("..", "basedata", "nomenklaturas.gpkg")
+    LGIA_ORTO_CIR_PATH_TAIL_NOMENKLATURA_GPKG_PATH = str(_basedata / "nomenklaturas.gpkg")
     LGIA_ORTO_CIR_PATH_TAIL_NOMENKLATURA_LAYER = "tks1_5000"
     LGIA_ORTO_CIR_PATH_TAIL_NOMENKLATURA_FIELD = "numurs"
 
     SILAVA_DTW_10_DOWNLOAD = False
-    SILAVA_DTW_10_CACHE_PATH = os.path.join("..", "data", "silava", "dtw", "10")
+    SILAVA_DTW_10_CACHE_PATH = str(_data / "silava" / "dtw" / "10")
     SILAVA_DTW_10_CACHE_FORCE_INVALIDATE = False
     SILAVA_DTW_10_PATH_HEAD = "https://silava.forestradar.com/data/rastra-dati/DTW/DTW_10ha_"
-    SILAVA_DTW_10_PATH_TAIL_NOMENKLATURA_GPKG_PATH = os.path.join("..", "basedata", "nomenklaturas.gpkg")
+    SILAVA_DTW_10_PATH_TAIL_NOMENKLATURA_GPKG_PATH = str(_basedata / "nomenklaturas.gpkg")
     SILAVA_DTW_10_PATH_TAIL_NOMENKLATURA_LAYER = "baltic_grid"
     SILAVA_DTW_10_PATH_TAIL_NOMENKLATURA_FIELD = "id"
 
     SILAVA_DTW_30_DOWNLOAD = True
-    SILAVA_DTW_30_CACHE_PATH = os.path.join("..", "data", "silava", "dtw", "30")
+    SILAVA_DTW_30_CACHE_PATH = str(_data / "silava" / "dtw" / "30")
     SILAVA_DTW_30_CACHE_FORCE_INVALIDATE = False
     SILAVA_DTW_30_PATH_HEAD = "https://silava.forestradar.com/data/rastra-dati/DTW_30ha/DTW_30ha_"
-    SILAVA_DTW_30_PATH_TAIL_NOMENKLATURA_GPKG_PATH = os.path.join("..", "basedata", "nomenklaturas.gpkg")
+    SILAVA_DTW_30_PATH_TAIL_NOMENKLATURA_GPKG_PATH = str(_basedata / "nomenklaturas.gpkg")
     SILAVA_DTW_30_PATH_TAIL_NOMENKLATURA_LAYER = "baltic_grid"
     SILAVA_DTW_30_PATH_TAIL_NOMENKLATURA_FIELD = "id"
 
+    WFS_DOWNLOAD_MAX_WORKERS = 8
+    WFS_PAGED_DOWNLOAD = False
+    WFS_PAGE_SIZE = 5000
+    WFS_MAX_PARALLEL = 8
+
     ZMNI_GPKG_DOWNLOAD = True
-    ZMNI_GPKG_CACHE_PATH = os.path.join("..", "data", "zmni", "gpkg")
+    ZMNI_GPKG_CACHE_PATH = str(_data / "zmni" / "gpkg")
     ZMNI_GPKG_CACHE_FORCE_INVALIDATE = False
     ZMNI_GPKG_WFS_PATH = "https://lvmgeoserver.lvm.lv/geoserver/zmni/ows"
     ZMNI_GPKG_WFS_LAYERS = [
@@ -96,7 +130,7 @@ class DownloadConfig(config.Config):
     ]
 
     MANTOJUMS_GPKG_DOWNLOAD = True
-    MANTOJUMS_GPKG_CACHE_PATH = os.path.join("..", "data", "mantojums", "gpkg")
+    MANTOJUMS_GPKG_CACHE_PATH = str(_data / "mantojums" / "gpkg")
     MANTOJUMS_GPKG_CACHE_FORCE_INVALIDATE = False
     MANTOJUMS_GPKG_WFS_PATH = "https://geoserver.mantojums.lv/geoserver/ows"
     MANTOJUMS_GPKG_WFS_LAYERS = [
@@ -105,7 +139,7 @@ class DownloadConfig(config.Config):
     ]
 
     OZOLS_GPKG_DOWNLOAD = True
-    OZOLS_GPKG_CACHE_PATH = os.path.join("..", "data", "ozols", "gpkg")
+    OZOLS_GPKG_CACHE_PATH = str(_data / "ozols" / "gpkg")
     OZOLS_GPKG_CACHE_FORCE_INVALIDATE = False
     OZOLS_GPKG_WFS_PATH = "https://ozols.gov.lv/arcgis/services/OZOLS_DABASDATI_PUB_INSPIRE/MapServer/WFSServer"
     OZOLS_GPKG_WFS_LAYERS = [
@@ -117,34 +151,34 @@ class DownloadConfig(config.Config):
     ]
 
     MVR_DOWNLOAD = True
-    MVR_CACHE_PATH = os.path.join("..", "data", "mvr", "shp")
+    MVR_CACHE_PATH = str(_data / "mvr" / "shp")
     MVR_CACHE_FORCE_INVALIDATE = False
     MVR_DIRECT_DATA_PATH = ""
     MVR_DATA_PATH = "https://data.gov.lv/dati/lv/dataset/meza-valsts-registra-meza-dati.jsonld"
-    MVR_TERITORIJAS_VM_GPKG_PATH = os.path.join("..", "basedata", "vmd_teritorijas.gpkg")
+    MVR_TERITORIJAS_VM_GPKG_PATH = str(_basedata / "vmd_teritorijas.gpkg")
     MVR_TERITORIJAS_VM_LAYER = "vm_cleaned"
     MVR_TERITORIJAS_VM_FIELD = "vmd_head_1"
-    MVR_TERITORIJAS_MZN_GPKG_PATH = os.path.join("..", "basedata", "vmd_teritorijas.gpkg")
+    MVR_TERITORIJAS_MZN_GPKG_PATH = str(_basedata / "vmd_teritorijas.gpkg")
     MVR_TERITORIJAS_MZN_LAYER = "mzn_cleaned"
     MVR_TERITORIJAS_MZN_FIELD = "vmd_forest"
     MVR_RULES = [
-        ("bioremediacija", "", [os.path.join("..", "basedata", "csv", "bioremediacija.csv")]),
-        ("filtracija", "", [os.path.join("..", "basedata", "csv", "filtracija.csv")]),
+        ("bioremediacija", "", [str(_csv / "bioremediacija.csv")]),
+        ("filtracija", "", [str(_csv / "filtracija.csv")]),
         (
             "pludi",
             "int(ZKAT) != 10",
             [
-                os.path.join("..", "basedata", "csv", "pludiMT.csv"),
-                os.path.join("..", "basedata", "csv", "pludiZKAT.csv"),
+                str(_csv / "pludiMT.csv"),
+                str(_csv / "pludiZKAT.csv"),
             ],
         ),
         (
             "klimats",
             "2 if int(ZKAT) != 10 else (1 if int(VGR) in {1, 2, 3} or int(A10) < 60 else 0)",
             [
-                os.path.join("..", "basedata", "csv", "klima_MT.csv"),
-                os.path.join("..", "basedata", "csv", "klima_MT_123.csv"),
-                os.path.join("..", "basedata", "csv", "klima_ZKAT.csv"),
+                str(_csv / "klima_MT.csv"),
+                str(_csv / "klima_MT_123.csv"),
+                str(_csv / "klima_ZKAT.csv"),
             ],
         ),
     ]
@@ -152,8 +186,8 @@ class DownloadConfig(config.Config):
     BIOTOPI_DOWNLOAD = True
     BIOTOPI_EXCLUDE_FIELD = "code_ec"
     BIOTOPI_EXCLUDE_VALUES = ["2180"]
-    BIOTOPI_CACHE_PATH = os.path.join("..", "data", "dap", "biotopi", "shp")
-    BIOTOPI_GPKG_CACHE_PATH = os.path.join("..", "data", "dap", "biotopi", "gpkg")
+    BIOTOPI_CACHE_PATH = str(_data / "dap" / "biotopi" / "shp")
+    BIOTOPI_GPKG_CACHE_PATH = str(_data / "dap" / "biotopi" / "gpkg")
     BIOTOPI_CACHE_FORCE_INVALIDATE = False
     BIOTOPI_DATA_PATH = "https://data.gov.lv/dati/lv/dataset/aizsargajamas-dzivotnes-biotopi.jsonld"
     BIOTOPI_DATA_NAME = "Aizsargājamās dzīvotnes - biotopi (shapefile)."
@@ -162,8 +196,8 @@ class DownloadConfig(config.Config):
     }
 
     MIKROLIEGUMI_DOWNLOAD = True
-    MIKROLIEGUMI_CACHE_PATH = os.path.join("..", "data", "dap", "mikroliegumi", "shp")
-    MIKROLIEGUMI_GPKG_CACHE_PATH = os.path.join("..", "data", "dap", "mikroliegumi", "gpkg")
+    MIKROLIEGUMI_CACHE_PATH = str(_data / "dap" / "mikroliegumi" / "shp")
+    MIKROLIEGUMI_GPKG_CACHE_PATH = str(_data / "dap" / "mikroliegumi" / "gpkg")
     MIKROLIEGUMI_CACHE_FORCE_INVALIDATE = False
     MIKROLIEGUMI_DATA_PATH = "https://data.gov.lv/dati/lv/dataset/mikroliegumi.jsonld"
     MIKROLIEGUMI_DATA_NAME = "Mikroliegumi un to buferzonas (shapefile)"
@@ -173,8 +207,8 @@ class DownloadConfig(config.Config):
     }
 
     AIZSARGAJAMAS_SUGAS_DOWNLOAD = True
-    AIZSARGAJAMAS_SUGAS_CACHE_PATH = os.path.join("..", "data", "dap", "aizsargajamas_sugas", "shp")
-    AIZSARGAJAMAS_SUGAS_GPKG_CACHE_PATH = os.path.join("..", "data", "dap", "aizsargajamas_sugas", "gpkg")
+    AIZSARGAJAMAS_SUGAS_CACHE_PATH = str(_data / "dap" / "aizsargajamas_sugas" / "shp")
+    AIZSARGAJAMAS_SUGAS_GPKG_CACHE_PATH = str(_data / "dap" / "aizsargajamas_sugas" / "gpkg")
     AIZSARGAJAMAS_SUGAS_CACHE_FORCE_INVALIDATE = False
     AIZSARGAJAMAS_SUGAS_DATA_PATH = "https://data.gov.lv/dati/lv/dataset/aizsargajamo-sugu-atradnes.jsonld"
     AIZSARGAJAMAS_SUGAS_DATA_NAME = "Aizsargājamo sugu atradnes (shapefile)"
@@ -184,47 +218,47 @@ class DownloadConfig(config.Config):
     }
 
     CELI_DOWNLOAD = True
-    CELI_CACHE_PATH = os.path.join("..", "data", "celi", "shp")
-    CELI_GPKG_CACHE_PATH = os.path.join("..", "data", "celi", "gpkg")
+    CELI_CACHE_PATH = str(_data / "celi" / "shp")
+    CELI_GPKG_CACHE_PATH = str(_data / "celi" / "gpkg")
     CELI_CACHE_FORCE_INVALIDATE = False
     CELI_PATH = "https://download.geofabrik.de/europe/latvia-latest-free.shp.zip"
     CELI_PATH_ZIP_FILTERS = ["gis_osm_roads"]
     CELI_PATH_GPKG_LAYER = "RM_celi"
 
     ZMNI_TIF_RASTERIZE = True
-    ZMNI_TIF_CACHE_PATH = os.path.join("..", "data", "zmni", "tif")
+    ZMNI_TIF_CACHE_PATH = str(_data / "zmni" / "tif")
     ZMNI_TIF_CACHE_FORCE_INVALIDATE = False
 
     MANTOJUMS_TIF_RASTERIZE = True
-    MANTOJUMS_TIF_CACHE_PATH = os.path.join("..", "data", "mantojums", "tif")
+    MANTOJUMS_TIF_CACHE_PATH = str(_data / "mantojums" / "tif")
     MANTOJUMS_TIF_CACHE_FORCE_INVALIDATE = False
 
     OZOLS_TIF_RASTERIZE = True
-    OZOLS_TIF_CACHE_PATH = os.path.join("..", "data", "ozols", "tif")
+    OZOLS_TIF_CACHE_PATH = str(_data / "ozols" / "tif")
     OZOLS_TIF_CACHE_FORCE_INVALIDATE = False
 
     MVR_TIF_RASTERIZE = True
-    MVR_TIF_CACHE_PATH = os.path.join("..", "data", "mvr", "tif")
+    MVR_TIF_CACHE_PATH = str(_data / "mvr" / "tif")
     MVR_TIF_CACHE_FORCE_INVALIDATE = False
 
     BIOTOPI_TIF_RASTERIZE = True
-    BIOTOPI_TIF_CACHE_PATH = os.path.join("..", "data", "dap", "biotopi", "tif")
+    BIOTOPI_TIF_CACHE_PATH = str(_data / "dap" / "biotopi" / "tif")
     BIOTOPI_TIF_CACHE_FORCE_INVALIDATE = False
 
     MIKROLIEGUMI_TIF_RASTERIZE = True
-    MIKROLIEGUMI_TIF_CACHE_PATH = os.path.join("..", "data", "dap", "mikroliegumi", "tif")
+    MIKROLIEGUMI_TIF_CACHE_PATH = str(_data / "dap" / "mikroliegumi" / "tif")
     MIKROLIEGUMI_TIF_CACHE_FORCE_INVALIDATE = False
 
     AIZSARGAJAMAS_SUGAS_TIF_RASTERIZE = True
-    AIZSARGAJAMAS_SUGAS_TIF_CACHE_PATH = os.path.join("..", "data", "dap", "aizsargajamas_sugas", "tif")
+    AIZSARGAJAMAS_SUGAS_TIF_CACHE_PATH = str(_data / "dap" / "aizsargajamas_sugas" / "tif")
     AIZSARGAJAMAS_SUGAS_TIF_CACHE_FORCE_INVALIDATE = False
 
     CELI_TIF_RASTERIZE = True
-    CELI_TIF_CACHE_PATH = os.path.join("..", "data", "celi", "tif")
+    CELI_TIF_CACHE_PATH = str(_data / "celi" / "tif")
     CELI_TIF_CACHE_FORCE_INVALIDATE = False
 
     BZI_TIF_RASTERIZE = True
-    BZI_TIF_CACHE_PATH = os.path.join("..", "data", "bzi", "tif")
+    BZI_TIF_CACHE_PATH = str(_data / "bzi" / "tif")
     BZI_TIF_CACHE_FORCE_INVALIDATE = False
     BZI_TIF_DTW_30 = True
     BZI_AIZSARGAJAMAS_SUGAS_DATA_FILE_BUFFERS = {
@@ -233,19 +267,21 @@ class DownloadConfig(config.Config):
     }
 
     TESSELLATE = True
+    # layer lists are frozen to tuples once here instead of aliasing the (mutable) source lists/dicts,
+    # so the tessellation stage iterates plain tuples and later mutation of the sources cannot leak in
     TESSELLATE_REMOVE_BEFORE_TESSELLATION = {
-        MANTOJUMS_GPKG_CACHE_PATH: MANTOJUMS_GPKG_WFS_LAYERS,
-        OZOLS_GPKG_CACHE_PATH: OZOLS_GPKG_WFS_LAYERS,
-        BIOTOPI_GPKG_CACHE_PATH: BIOTOPI_DATA_FILE_BUFFERS,
-        MIKROLIEGUMI_GPKG_CACHE_PATH: MIKROLIEGUMI_DATA_FILE_BUFFERS,
+        MANTOJUMS_GPKG_CACHE_PATH: tuple(MANTOJUMS_GPKG_WFS_LAYERS),
+        OZOLS_GPKG_CACHE_PATH: tuple(OZOLS_GPKG_WFS_LAYERS),
+        BIOTOPI_GPKG_CACHE_PATH: tuple(BIOTOPI_DATA_FILE_BUFFERS),
+        MIKROLIEGUMI_GPKG_CACHE_PATH: tuple(MIKROLIEGUMI_DATA_FILE_BUFFERS),
     }
     TESSELLATE_REMOVE_AFTER_TESSELLATION = {
-        AIZSARGAJAMAS_SUGAS_GPKG_CACHE_PATH: AIZSARGAJAMAS_SUGAS_DATA_FILE_BUFFERS,
+        AIZSARGAJAMAS_SUGAS_GPKG_CACHE_PATH: tuple(AIZSARGAJAMAS_SUGAS_DATA_FILE_BUFFERS),
     }
     TESSELLATE_SEED = 42
     TESSELLATE_POINT_METHOD = "tif"
     TESSELLATE_POINT_TIF_PATH = LGIA_TIF_CACHE_PATH
-    TESSELLATE_POINT_TIF_SUFFIX = "_hchm_dsm_fillnodata"
+    TESSELLATE_POINT_TIF_SUFFIX = "_hchm_dsm"
     TESSELLATE_POINT_TIF_RESAMPLE = True
     TESSELLATE_POINT_TIF_RESAMPLE_METHOD = "average"
     TESSELLATE_POINT_TIF_RESAMPLE_RESOLUTION = 10
@@ -263,48 +299,90 @@ class DownloadConfig(config.Config):
     TESSELLATE_PERCENTILES = [1, 25, 50, 75, 99]
     TESSELLATE_CALC = {"mean_div_std": "data.mean() / data.std()"}
     TESSELLATE_VALUE_PERCENTILES = {"bzi": [0, 1, 2]}
-    TESSELLATE_GPKG_CACHE_PATH = os.path.join("..", "data", "tessellation", "gpkg")
+    TESSELLATE_GPKG_CACHE_PATH = str(_data / "tessellation" / "gpkg")
     TESSELLATE_GPKG_CACHE_LAYER = "tessellation"
     TESSELLATE_GPKG_CACHE_FORCE_INVALIDATE = False
     TESSELLATE_PRIORITY_SPLIT_KEY = ["kadastrs", "kvart", "nog"]
     TESSELLATE_PRIORITY_AREA_DIVISIONS = [20, 20, 20]
-    TESSELLATE_PRIORITY_OPTIMIZE_FIELD = "hchm_dsm_fillnodata_mean_div_std"
+    TESSELLATE_PRIORITY_OPTIMIZE_FIELD = "hchm_dsm_mean_div_std"
     TESSELLATE_PRIORITY_NEIGHBOR_CORNERS = True
 
+    del _data, _basedata, _csv
+
 
 def print_progress_bar(config: DownloadConfig, current: int, total: int, prefix: str = "", suffix: str = "") -> None:
     misc.print_progress_bar(current, total, prefix, suffix) if config.PRINT_PROGRESS_BAR else config.print(f"{prefix} {100 * current / total}% {suffix}")
 
 
+def _check_call_gdal(args: list[str]) -> bool:
+    # in-process fast path, skips fork/exec and repeated gdal driver registration for the known utilities
+    if args[0] == "gdaldem":
+        gdal.DEMProcessing(args[-1], args[-2], processing=args[1], options=args[2:-2])
+    elif args[0] == "gdal_rasterize":
+        gdal.Rasterize(args[-1], args[-2], options=args[1:-2])
+    elif args[0] == "gdalwarp":
+        gdal.Warp(args[-1], args[-2], options=args[1:-2])
+    else:
+        return False
+    return True
+
+
 def check_call(config: DownloadConfig, cmd: str, unlink_on_exc: str | None = None, throw: bool = True) -> None:
     if config.PRINT_CMD:
         config.print(cmd)
+    args = shlex.split(cmd)
     try:
-        subprocess.check_call(shlex.split(cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    except subprocess.CalledProcessError as exc:
+        if not _check_call_gdal(args):
+            # DEVNULL instead of PIPE: unread pipes can fill up and deadlock the child on large outputs
+            subprocess.run(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    except (subprocess.CalledProcessError, RuntimeError) as exc:
         if unlink_on_exc:
             misc.silent_unlink(unlink_on_exc)
         if throw:
             raise
-        config.print(f"got '{exc.returncode}' from '{cmd}', skipping")
+        config.print(f"got '{getattr(exc, 'returncode', exc)}' from '{cmd}', skipping")
+
+
+_EMPTY_GDF: gpd.GeoDataFrame | None = None
 
 
 def concat(gdfs: Iterable[gpd.GeoDataFrame]) -> gpd.GeoDataFrame:
     gdfs = tuple(gdfs)
-    if gdfs:
+    if not gdfs:
+        # constructing an empty frame triggers a CRS lookup each time, build it once and hand out copies
+        global _EMPTY_GDF  # noqa: PLW0603
+        if _EMPTY_GDF is None:
+            _EMPTY_GDF = gpd.GeoDataFrame(geometry=[], crs="EPSG:3059")  # pyright: ignore [reportCallIssue]
+        return _EMPTY_GDF.copy()
+    try:
+        # zero-copy chunked concatenation of the underlying arrow tables, halves peak memory vs pd.concat
+        return _arrow_to_geopandas(pa.concat_tables(tuple(pa.table(gdf.to_arrow()) for gdf in gdfs), promote_options="permissive"))
+    except (pa.ArrowInvalid, pa.ArrowTypeError, ValueError):
         return pd.concat(gdfs, ignore_index=True)  # pyright: ignore [reportReturnType]
-    return gpd.GeoDataFrame(geometry=[], crs="EPSG:3059")  # pyright: ignore [reportCallIssue]
+
+
+_INDEX_CACHE: dict[str, dict[str, str | None]] = {}
 
 
 def download_data(config: DownloadConfig, data_path: str, name: str, cache_path: str, force_invalidate: bool) -> str:
     index_path = os.path.join(cache_path, "index.json")
-    config.print(f"downloading index from '{data_path}'")
-    misc.download(data_path, index_path, force_invalidate)
-    with open(index_path, encoding="utf-8") as file:
-        index = json.load(file)
-    for node in index.get("@graph", ()):
-        if node.get("@type") == "dcat:Distribution" and node.get("dct:title") == name:
-            path = node.get("dcat:accessURL", {}).get("@id")
-            config.print(f"downloading '{name}' from '{path}'")
-            return misc.download(path, os.path.join(cache_path, name.lower()), force_invalidate)
+    distributions = _INDEX_CACHE.get(data_path)
+    if distributions is None:
+        try:
+            # a forced invalidation always refetches, the TTL only saves the re-download of a recent index
+            fresh = not force_invalidate and time.time() - os.stat(index_path).st_mtime < config.INDEX_TTL_SEC
+        except OSError:
+            fresh = False
+        if not fresh:
+            config.print(f"downloading index from '{data_path}'")
+            misc.download(data_path, index_path, force_invalidate)
+        with open(index_path, "rb") as file:
+            index: dict[str, Any] = orjson.loads(file.read())
+        # only the distribution title->url pairs are ever looked up, keep those and drop the rest of the jsonld document
+        distributions = {node.get("dct:title"): node.get("dcat:accessURL", {}).get("@id") for node in index.get("@graph", ()) if node.get("@type") == "dcat:Distribution"}
+        _INDEX_CACHE[data_path] = distributions  # pyright: ignore [reportArgumentType]
+    if name in distributions:
+        path = distributions[name]
+        config.print(f"downloading '{name}' from '{path}'")
+        return misc.download(path, os.path.join(cache_path, name.lower()), force_invalidate)  # pyright: ignore [reportArgumentType]
     raise ValueError(f"'{name}' not found")
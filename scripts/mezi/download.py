@@ -9,20 +9,34 @@
 # Dependencies: environment.yml
 # Python Version: 3.12+
 
+import concurrent.futures
+import contextlib
 import functools
+import hashlib
 import logging
 import math
-import operator
 import os
+import re
+import shutil
 import sys
+import tarfile
 import warnings
 import zipfile
 from collections.abc import Callable, Iterable, Mapping
 from typing import Any
 
+import geopandas as gpd
+import numba
 import numpy as np
 import pdal
+import pyogrio
+import rasterio
+import rasterio.transform
+import rasterio.vrt
+import rasterio.windows
 import shapely
+import zstandard
+from osgeo import gdal
 
 from mezi import config as mezi_config
 from mezi import mvr, tessellate
@@ -41,6 +55,9 @@ logger.addFilter(_filter_fiona_log)
 warnings.filterwarnings("ignore", "GeoSeries.notna", UserWarning)
 
 
+# shapely geometries hash by content, so the (wkt, bbox) key is stable; batch drivers calling
+# extra_main repeatedly with the same extent then skip the geometry walk and digest
+@functools.lru_cache(maxsize=256)
 def _bbox(wkt: shapely.Geometry | None, bbox: tuple[float, ...] | None) -> tuple[float, ...]:
     bbox = bbox or (wkt and wkt.bounds)  # pyright: ignore [reportAttributeAccessIssue]
     if not bbox or len(bbox) != 4:  # noqa: PLR2004
@@ -48,8 +65,14 @@ def _bbox(wkt: shapely.Geometry | None, bbox: tuple[float, ...] | None) -> tuple
     return bbox
 
 
+@functools.lru_cache(maxsize=256)
 def name(wkt: shapely.Geometry | None, bbox: tuple[float, ...] | None) -> str:
-    return str(hash(_bbox(wkt, bbox)))
+    # hash() is randomized per interpreter run, which changed every cache path between runs
+    # and defeated all the skip-if-exists guards; a content digest is stable
+    digest = hashlib.blake2b(repr(_bbox(wkt, bbox)).encode(), digest_size=12)
+    if wkt is not None:
+        digest.update(shapely.to_wkb(wkt))
+    return digest.hexdigest()
 
 
 def _download(
@@ -62,25 +85,108 @@ def _download(
     cache_path: str,
     force_invalidate: bool,
 ) -> list[str]:
-    tails = geom.filter(geom.read_file(config, gpkg_path, layer, config.bbox), config.wkt, config.bbox)[field]
+    # the wkt clip runs inside OGR and only the tail field is materialized alongside the geometry;
+    # read_file memoizes on (path, layer, bbox/mask, columns), so the datasets sharing a nomenclature
+    # (las + orto_rgb + orto_cir) pay for the tails lookup once per run
+    tails = geom.read_file(config, gpkg_path, layer, config.bbox, columns=[field], mask=config.wkt)[field]
     tails_len = tails.shape[0]
     suffix = f"of {tails_len}"
+    source_paths = tuple(get_path(str(tail)) for tail in tails)
+    # the fetches are independent and latency-bound, keep a bounded number in flight while reporting progress in order
+    downloads = misc.prefetch((functools.partial(misc.download, path, os.path.join(cache_path, os.path.split(path)[1]), force_invalidate) for path in source_paths), config.DOWNLOAD_MAX_WORKERS)
+    # terminal redraws are surprisingly expensive on large tile sets, cap the bar at ~100 updates
+    update_every = max(1, tails_len // 100)
     paths = []
-    for current, tail in enumerate(tails):
-        path = get_path(str(tail))
-        mezi_config.print_progress_bar(config, current, tails_len, f"downloading {name} from {path}", suffix)
-        paths.append(misc.download(path, os.path.join(cache_path, os.path.split(path)[1]), force_invalidate))
+    for current, (source_path, path) in enumerate(zip(source_paths, downloads, strict=True)):
+        if not current % update_every:
+            mezi_config.print_progress_bar(config, current, tails_len, f"downloading {name} from {source_path}", suffix)
+        paths.append(path)
     mezi_config.print_progress_bar(config, tails_len, tails_len, f"all {name} downloaded", suffix)
     return paths
 
 
-_TIF_FILLNODATA = "gdal_fillnodata -md 25 -si 0 -b 1 -of GTiff '{input}' '{output}'"
-_TIF_TRI = "gdaldem TRI '{input}' '{output}'"
-_TIF_TPI = "gdaldem TPI '{input}' '{output}'"
-_TIF_SLOPE = "gdaldem slope '{input}' '{output}'"
-_TIF_ROUGHNESS = "gdaldem roughness '{input}' '{output}'"
-_TIF_ASPECT = "gdaldem aspect '{input}' '{output}'"
-_TIF_BA = "gdal_calc -A '{input_dtm}' -B '{input_dsm}' --calc='B-A' --outfile '{output}'"
+# threaded libdeflate compression and 512x512 tiling for every created GTiff, tiled outputs also speed up the windowed reads later;
+# ZLEVEL=1 roughly doubles write throughput for a negligible size penalty, no PREDICTOR since the templates serve mixed int/float outputs
+_TIF_CO = " ".join(f"-co '{option}'" for option in ("NUM_THREADS=ALL_CPUS", "COMPRESS=DEFLATE", "ZLEVEL=1", "TILED=YES", "BLOCKXSIZE=512", "BLOCKYSIZE=512"))
+_TIF_TRI = f"gdaldem TRI {_TIF_CO} '{{input}}' '{{output}}'"
+_TIF_TPI = f"gdaldem TPI {_TIF_CO} '{{input}}' '{{output}}'"
+_TIF_SLOPE = f"gdaldem slope {_TIF_CO} '{{input}}' '{{output}}'"
+_TIF_ROUGHNESS = f"gdaldem roughness {_TIF_CO} '{{input}}' '{{output}}'"
+_TIF_ASPECT = f"gdaldem aspect {_TIF_CO} '{{input}}' '{{output}}'"
+
+# product tables built once at import, the loops below iterate only the rows whose config flag is enabled
+_TIF_DEM_PRODUCTS = (
+    ("LGIA_TIF_TRI", "_tri.tif", _TIF_TRI),
+    ("LGIA_TIF_TPI", "_tpi.tif", _TIF_TPI),
+    ("LGIA_TIF_SLOPE", "_slope.tif", _TIF_SLOPE),
+    ("LGIA_TIF_ROUGHNESS", "_roughness.tif", _TIF_ROUGHNESS),
+    ("LGIA_TIF_ASPECT", "_aspect.tif", _TIF_ASPECT),
+)
+_TIF_HAG_PRODUCTS = (
+    ("LGIA_TIF_HAG", "hag", None),
+    ("LGIA_TIF_CHM", "chm", "Classification[3:5]"),
+    ("LGIA_TIF_LCHM", "lchm", "Classification[3:3]"),
+    ("LGIA_TIF_MCHM", "mchm", "Classification[4:4]"),
+    ("LGIA_TIF_HCHM", "hchm", "Classification[5:5]"),
+)
+
+
+_LAS_LIMITS = re.compile(r"Classification\[(\d+):(\d+)\]")
+
+
+def _las_to_tifs(path: str, products: tuple[tuple[str, str | None], ...]) -> str:
+    # decode the las once and rasterize every requested classification subset from the in-memory points,
+    # instead of re-reading the tile for each of the dtm/hag/chm variants
+    pipeline = pdal.Reader.las(filename=path, default_srs="EPSG:3059").pipeline()
+    pipeline.execute()
+    array = pipeline.arrays[0]
+    classification = array["Classification"]
+    for output, limits in products:
+        data = array
+        match = limits and _LAS_LIMITS.fullmatch(limits)
+        if match:
+            low, high = int(match.group(1)), int(match.group(2))
+            data = array[(classification >= low) & (classification <= high)]
+        pdal.Writer.gdal(
+            filename=output,
+            default_srs="EPSG:3059",
+            resolution=1,
+            gdaldriver="GTiff",
+            data_type="float",
+            nodata=255,
+            output_type="idw",
+            # fills cells without points from up to 25 cells away during interpolation,
+            # replacing the separate gdal_fillnodata pass over the merged mosaics
+            window_size=25,
+        ).pipeline(data).execute()
+    return path
+
+
+def _ba_windows_calc(dtm_path: str, dsm_path: str, output_path: str) -> None:
+    # height above ground as a windowed in-process subtract, the gdal_calc subprocess paid
+    # fork+exec+driver registration and materialized both rasters whole
+    with rasterio.open(dtm_path) as dtm, rasterio.open(dsm_path) as dsm:
+        profile = dsm.profile | {"tiled": True, "blockxsize": 512, "blockysize": 512, "compress": "deflate", "zlevel": 1, "num_threads": "all_cpus"}
+        with rasterio.open(output_path, "w", **profile) as dst:
+            for _, window in dst.block_windows(1):
+                dst.write(dsm.read(1, window=window) - dtm.read(1, window=window), 1, window=window)
+
+
+def _rasterize_las_tiles(config: mezi_config.DownloadConfig, paths: list[str], products: tuple[tuple[str, str | None], ...]) -> dict[str, tuple[str, ...]]:
+    # one decode per las tile on a process pool, pdal runs a single pipeline on one core
+    tile_path = os.path.join(config.LGIA_TIF_CACHE_PATH, "tiles")
+    os.makedirs(tile_path, exist_ok=True)
+    outputs = {product: tuple(os.path.join(tile_path, f"{os.path.splitext(os.path.basename(path))[0]}_{product}.tif") for path in paths) for product, _ in products}
+    jobs = []
+    for index, path in enumerate(paths):
+        missing = tuple((outputs[product][index], limits) for product, limits in products if not os.path.isfile(outputs[product][index]))
+        if missing:
+            jobs.append((path, missing))
+    if jobs:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as executor:
+            for path in executor.map(_las_to_tifs, *zip(*jobs, strict=True)):
+                config.print(f"rasterized '{path}'")
+    return outputs
 
 
 def _download_lgia_las(config: mezi_config.DownloadConfig) -> None:
@@ -99,111 +205,40 @@ def _download_lgia_las(config: mezi_config.DownloadConfig) -> None:
         return
     force_invalidate = config.LGIA_TIF_CACHE_FORCE_INVALIDATE
     head = os.path.join(config.LGIA_TIF_CACHE_PATH, config.name)
-    bounds = f"([{math.floor(config.bbox[0])}, {math.ceil(config.bbox[2])}], [{math.floor(config.bbox[1])}, {math.ceil(config.bbox[3])}])" if config.bbox else None
+    ul_lr = _TIF_MERGE_UL_LR.format(ulx=math.floor(config.bbox[0]), uly=math.ceil(config.bbox[3]), lrx=math.ceil(config.bbox[2]), lry=math.floor(config.bbox[1])) if config.bbox else ""
     os.makedirs(config.LGIA_TIF_CACHE_PATH, exist_ok=True)
     dtm_path = head + "_dtm.tif"
     config.OUTPUT_FILES_TO_ZIP.append(dtm_path)
-    dtm_fillnodata_path = head + "_dtm_fillnodata.tif"
-    config.OUTPUT_FILES_TO_ZIP.append(dtm_fillnodata_path)
+    products = []
+    if config.LGIA_TIF_DTM and (force_invalidate or not os.path.isfile(dtm_path)):
+        products.append(("dtm", "Classification[2:2]"))
+    hag_products = tuple(product for product in _TIF_HAG_PRODUCTS if getattr(config, product[0]))
+    products.extend((f"{_name}_dsm", limits) for _, _name, limits in hag_products if force_invalidate or not os.path.isfile(f"{head}_{_name}.tif"))
+    tile_tifs = _rasterize_las_tiles(config, paths, tuple(products))
     if config.LGIA_TIF_DTM and (force_invalidate or not os.path.isfile(dtm_path)):
         config.print(f"generating '{dtm_path}'")
-        (
-            functools.reduce(
-                operator.__or__,
-                (
-                    pdal.Reader(
-                        type="readers.las",
-                        filename=path,
-                        default_srs="EPSG:3059",
-                    )
-                    for path in paths
-                ),
-            )
-            | pdal.Filter(
-                type="filters.range",
-                limits="Classification[2:2]",
-            )
-            | pdal.Writer(
-                type="writers.gdal",
-                filename=dtm_path,
-                default_srs="EPSG:3059",
-                resolution=1,
-                gdaldriver="GTiff",
-                data_type="float",
-                nodata=255,
-                output_type="idw",
-                bounds=bounds,
-            )
-        ).execute_streaming()
-        config.print(f"generating '{dtm_fillnodata_path}'")
-        mezi_config.check_call(config, _TIF_FILLNODATA.format(input=dtm_path, output=dtm_fillnodata_path))
-    for check, output, cmd in (
-        (config.LGIA_TIF_TRI, head + "_tri.tif", _TIF_TRI),
-        (config.LGIA_TIF_TPI, head + "_tpi.tif", _TIF_TPI),
-        (config.LGIA_TIF_SLOPE, head + "_slope.tif", _TIF_SLOPE),
-        (config.LGIA_TIF_ROUGHNESS, head + "_roughness.tif", _TIF_ROUGHNESS),
-        (config.LGIA_TIF_ASPECT, head + "_aspect.tif", _TIF_ASPECT),
-    ):
-        if not check:
-            continue
+        mezi_config.check_call(config, _TIF_MERGE.format(output=dtm_path, ps=1, ul_lr=ul_lr, nodata=_TIF_MERGE_NODATA.format(nodata=255), input="' '".join(tile_tifs["dtm"])))
+    for _, suffix, cmd in (product for product in _TIF_DEM_PRODUCTS if getattr(config, product[0])):
+        output = head + suffix
         config.OUTPUT_FILES_TO_ZIP.append(output)
         if force_invalidate or not os.path.isfile(output):
             config.print(f"generating '{output}'")
-            mezi_config.check_call(config, cmd.format(input=dtm_fillnodata_path, output=output))
-    for check, _name, limits in (
-        (config.LGIA_TIF_HAG, "hag", None),
-        (config.LGIA_TIF_CHM, "chm", "Classification[3:5]"),
-        (config.LGIA_TIF_LCHM, "lchm", "Classification[3:3]"),
-        (config.LGIA_TIF_MCHM, "mchm", "Classification[4:4]"),
-        (config.LGIA_TIF_HCHM, "hchm", "Classification[5:5]"),
-    ):
-        if not check:
-            continue
+            mezi_config.check_call(config, cmd.format(input=dtm_path, output=output))
+    for _, _name, _ in hag_products:
         output = f"{head}_{_name}.tif"
         config.OUTPUT_FILES_TO_ZIP.append(output)
         dsm_path = f"{head}_{_name}_dsm.tif"
         config.OUTPUT_FILES_TO_ZIP.append(dsm_path)
-        dsm_fillnodata_path = f"{head}_{_name}_dsm_fillnodata.tif"
-        config.OUTPUT_FILES_TO_ZIP.append(dsm_fillnodata_path)
         if force_invalidate or not os.path.isfile(output):
             config.print(f"generating '{dsm_path}'")
-            inputs = functools.reduce(
-                operator.__or__,
-                (
-                    pdal.Reader(
-                        type="readers.las",
-                        filename=path,
-                        default_srs="EPSG:3059",
-                    )
-                    for path in paths
-                ),
-            )
-            if limits:
-                inputs |= pdal.Filter(type="filters.range", limits=limits)
-            (
-                inputs
-                | pdal.Writer(
-                    type="writers.gdal",
-                    filename=dsm_path,
-                    default_srs="EPSG:3059",
-                    resolution=1,
-                    gdaldriver="GTiff",
-                    data_type="float",
-                    nodata=255,
-                    output_type="idw",
-                    bounds=bounds,
-                )
-            ).execute_streaming()
-            config.print(f"generating '{dsm_fillnodata_path}'")
-            mezi_config.check_call(config, _TIF_FILLNODATA.format(input=dsm_path, output=dsm_fillnodata_path))
+            mezi_config.check_call(config, _TIF_MERGE.format(output=dsm_path, ps=1, ul_lr=ul_lr, nodata=_TIF_MERGE_NODATA.format(nodata=255), input="' '".join(tile_tifs[f"{_name}_dsm"])))
             config.print(f"generating '{output}'")
-            mezi_config.check_call(config, _TIF_BA.format(input_dtm=dtm_fillnodata_path, input_dsm=dsm_fillnodata_path, output=output))
+            _ba_windows_calc(dtm_path, dsm_path, output)
 
 
-_TIF_MERGE_IGNORE = " -n '{ignore}'"
 _TIF_MERGE_NODATA = " -a_nodata '{nodata}'"
-_TIF_MERGE_INIT = " -init 0"
-_TIF_MERGE = "gdal_merge -o '{output}' -ps 5 5 -tap{ignore}{nodata}{init} '{input}'"
+_TIF_MERGE_UL_LR = " -ul_lr {ulx} {uly} {lrx} {lry}"
+_TIF_MERGE = f"gdal_merge -o '{{output}}' -ps {{ps}} {{ps}} -tap {_TIF_CO}{{ul_lr}}{{nodata}} '{{input}}'"
 
 
 def _merge_tif(
@@ -214,29 +249,51 @@ def _merge_tif(
     output_suffix: str,
     ignore: Iterable[int] = (),
     nodata: int = 255,
+    materialize: bool = True,
 ) -> None:
+    tifs = tuple(tifs)
     if not tifs:
         config.print("no tifs to merge")
         return
     os.makedirs(cache_path, exist_ok=True)
-    output = os.path.join(cache_path, f"{config.name}{output_suffix}.tif")
+    head = os.path.join(cache_path, f"{config.name}{output_suffix}")
+    output = f"{head}.tif" if materialize else f"{head}.vrt"
     config.OUTPUT_FILES_TO_ZIP.append(output)
     config.print(f"merging {tifs} to '{output}'")
     if not force_invalidate and os.path.isfile(output):
         return
-    mezi_config.check_call(
-        config,
-        _TIF_MERGE.format(
-            output=output,
-            ignore="".join(_TIF_MERGE_IGNORE.format(ignore=ignore) for ignore in ignore),
-            nodata=_TIF_MERGE_NODATA.format(nodata=nodata) if nodata else "",
-            init="" if nodata else _TIF_MERGE_INIT,
-            input="' '".join(tifs),
+    # the vrt mosaic only references the inputs; gdal_merge re-read and rewrote every tile,
+    # a real tif is materialized (threaded, tiled, compressed) only when requested
+    vrt_path = f"{head}.vrt"
+    gdal.BuildVRT(
+        vrt_path,
+        list(tifs),
+        options=gdal.BuildVRTOptions(
+            xRes=5,
+            yRes=5,
+            targetAlignedPixels=True,
+            srcNodata=" ".join(str(value) for value in ignore) or None,
+            VRTNodata=nodata if nodata else None,
         ),
     )
+    if materialize:
+        gdal.Translate(output, vrt_path, creationOptions=["NUM_THREADS=ALL_CPUS", "COMPRESS=DEFLATE", "TILED=YES", "BLOCKXSIZE=512", "BLOCKYSIZE=512"])
+        misc.silent_unlink(vrt_path)
+
+
+def _merged_tif_cached(config: mezi_config.DownloadConfig, cache_path: str, output_suffix: str, force_invalidate: bool) -> bool:
+    # checked before the tile download loop: a cached mosaic makes the whole download + merge pass unnecessary
+    output = os.path.join(cache_path, f"{config.name}{output_suffix}.tif")
+    if force_invalidate or not os.path.isfile(output):
+        return False
+    config.OUTPUT_FILES_TO_ZIP.append(output)
+    config.print(f"'{output}' is cached, skipping download")
+    return True
 
 
 def _download_lgia_orto_rgb_tif(config: mezi_config.DownloadConfig) -> None:
+    if _merged_tif_cached(config, config.LGIA_ORTO_RGB_CACHE_PATH, "_orto_rgb", config.LGIA_ORTO_RGB_CACHE_FORCE_INVALIDATE):
+        return
     _merge_tif(
         config,
         _download(
@@ -269,6 +326,8 @@ def _download_lgia_orto_rgb_tfw(config: mezi_config.DownloadConfig) -> None:
 
 
 def _download_lgia_orto_cir_tif(config: mezi_config.DownloadConfig) -> None:
+    if _merged_tif_cached(config, config.LGIA_ORTO_CIR_CACHE_PATH, "_orto_cir", config.LGIA_ORTO_CIR_CACHE_FORCE_INVALIDATE):
+        return
     _merge_tif(
         config,
         _download(
@@ -301,6 +360,8 @@ def _download_lgia_orto_cir_tfw(config: mezi_config.DownloadConfig) -> None:
 
 
 def _download_silava_dtw_10(config: mezi_config.DownloadConfig) -> None:
+    if _merged_tif_cached(config, config.SILAVA_DTW_10_CACHE_PATH, "_dtw_10", config.SILAVA_DTW_10_CACHE_FORCE_INVALIDATE):
+        return
     _merge_tif(
         config,
         _download(
@@ -320,6 +381,8 @@ def _download_silava_dtw_10(config: mezi_config.DownloadConfig) -> None:
 
 
 def _download_silava_dtw_30(config: mezi_config.DownloadConfig) -> None:
+    if _merged_tif_cached(config, config.SILAVA_DTW_30_CACHE_PATH, "_dtw_30", config.SILAVA_DTW_30_CACHE_FORCE_INVALIDATE):
+        return
     _merge_tif(
         config,
         _download(
@@ -340,6 +403,30 @@ def _download_silava_dtw_30(config: mezi_config.DownloadConfig) -> None:
 
 _WFS_TO_GPKG_SPAT = " -spat {bbox} -spat_srs 'EPSG:3059'"
 _WFS_TO_GPKG = "ogr2ogr -overwrite -skipfailures{spat} -dim XY -t_srs 'EPSG:3059' -preserve_fid -makevalid '{output}' WFS:'{wfs}' '{layers}'"
+_WFS_GPKG_MERGE = "ogr2ogr -update '{output}' '{input}'"
+_WFS_NUMBER_MATCHED = re.compile(r'numberMatched="(\d+)"')
+
+
+def fetch_wfs_paged(config: mezi_config.DownloadConfig, wfs_path: str, layer: str) -> gpd.GeoDataFrame:
+    params: dict[str, Any] = {"service": "WFS", "version": "2.0.0", "request": "GetFeature", "typeNames": layer, "srsName": "EPSG:3059"}
+    if config.bbox:
+        params["bbox"] = ",".join(str(coord) for coord in config.bbox) + ",EPSG:3059"
+    # the shared keep-alive session reuses one TCP+TLS connection per host across the hits probe and every page
+    with misc.get_session().get(wfs_path, params={**params, "resultType": "hits"}, timeout=300) as response:
+        response.raise_for_status()
+        match = _WFS_NUMBER_MATCHED.search(response.text)
+    matched = int(match.group(1)) if match else 0
+    config.print(f"fetching {matched} features of '{layer}' from '{wfs_path}' in pages of {config.WFS_PAGE_SIZE}")
+    if not matched:
+        return mezi_config.concat(())
+
+    def fetch_page(start_index: int) -> gpd.GeoDataFrame:
+        with misc.get_session().get(wfs_path, params={**params, "startIndex": start_index, "count": config.WFS_PAGE_SIZE}, timeout=300) as response:
+            response.raise_for_status()
+            return pyogrio.read_dataframe(response.content)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=config.WFS_MAX_PARALLEL) as executor:
+        return mezi_config.concat(executor.map(fetch_page, range(0, matched, config.WFS_PAGE_SIZE)))
 
 
 def _download_wfs(
@@ -349,6 +436,7 @@ def _download_wfs(
     layers: Iterable[str],
     force_invalidate: bool,
 ) -> None:
+    layers = tuple(layers)
     if not layers:
         config.print("no layers to download")
         return
@@ -358,7 +446,24 @@ def _download_wfs(
     config.print(f"downloading {layers} from '{wfs_path}'")
     if not force_invalidate and os.path.isfile(output):
         return
-    mezi_config.check_call(config, _WFS_TO_GPKG.format(spat=_WFS_TO_GPKG_SPAT.format(bbox=" ".join(str(coord) for coord in config.bbox)) if config.bbox else "", output=output, wfs=wfs_path, layers="' '".join(layers)))
+    if config.WFS_PAGED_DOWNLOAD:
+        for index, layer in enumerate(layers):
+            gdf = fetch_wfs_paged(config, wfs_path, layer)
+            geom.write_file(config, gdf, output, layer=layer.split(":")[-1], mode="a" if index else "w", engine="pyogrio", unlink=not index)
+        return
+    spat = _WFS_TO_GPKG_SPAT.format(bbox=" ".join(str(coord) for coord in config.bbox)) if config.bbox else ""
+    if len(layers) == 1 or config.WFS_DOWNLOAD_MAX_WORKERS < 2:  # noqa: PLR2004
+        mezi_config.check_call(config, _WFS_TO_GPKG.format(spat=spat, output=output, wfs=wfs_path, layers="' '".join(layers)))
+        return
+    # layer fetches are latency-bound, grab them concurrently into per-layer parts and merge after
+    parts = tuple(os.path.join(cache_path, f"{config.name}_wfs_{index}.gpkg") for index in range(len(layers)))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=config.WFS_DOWNLOAD_MAX_WORKERS) as executor:
+        tuple(executor.map(lambda part_layer: mezi_config.check_call(config, _WFS_TO_GPKG.format(spat=spat, output=part_layer[0], wfs=wfs_path, layers=part_layer[1])), zip(parts, layers)))
+    misc.silent_unlink(output)
+    os.replace(parts[0], output)
+    for part in parts[1:]:
+        mezi_config.check_call(config, _WFS_GPKG_MERGE.format(output=output, input=part))
+        misc.silent_unlink(part)
 
 
 def _download_zmni_gpkg(config: mezi_config.DownloadConfig) -> None:
@@ -374,19 +479,33 @@ def _download_ozols_gpkg(config: mezi_config.DownloadConfig) -> None:
 
 
 def _extract_zip(config: mezi_config.DownloadConfig, zip_path: str, cache_path: str, force_invalidate: bool, filters: Iterable[str] = ()) -> list[str]:
+    filters = tuple(filters)
+    # a sentinel with the extracted listing short-circuits the per-entry stat storm on warm reruns
+    sentinel_path = os.path.join(cache_path, f".extracted_{'_'.join(filters)}")
+    if not force_invalidate and os.path.isfile(sentinel_path):
+        with open(sentinel_path, encoding="utf-8") as file:
+            paths = file.read().splitlines()
+        if all(os.path.isfile(path) for path in paths):
+            return paths
     config.print(f"extracting zip from '{zip_path}' to '{cache_path}'")
+    os.makedirs(cache_path, exist_ok=True)
     extracted = set()
     with zipfile.ZipFile(zip_path) as _zip:
         for info in _zip.infolist():
             if info.is_dir() or (filters and not any(_filter in info.filename for _filter in filters)):
                 continue
-            info.filename = os.path.basename(info.filename)
-            config.print(f"extracting '{info.filename}' to '{cache_path}'")
-            path = os.path.join(cache_path, info.filename)
+            filename = os.path.basename(info.filename)
+            config.print(f"extracting '{filename}' to '{cache_path}'")
+            path = os.path.join(cache_path, filename)
             if force_invalidate or not os.path.isfile(path):
-                _zip.extract(info, cache_path)
+                with _zip.open(info) as source, open(path, "wb") as sink:
+                    # 1 MiB buffers, the 64 KiB copyfileobj default throttles the large tif/shp payloads
+                    shutil.copyfileobj(source, sink, 1 << 20)
             extracted.add(path)
-    return sorted(extracted)
+    paths = sorted(extracted)
+    with open(sentinel_path, "w", encoding="utf-8") as file:
+        file.write("\n".join(paths))
+    return paths
 
 
 def _download_zip(config: mezi_config.DownloadConfig, data_path: str, name: str, cache_path: str, force_invalidate: bool) -> None:
@@ -409,7 +528,8 @@ def _read_to_gpkg(
         return
     os.makedirs(gpkg_cache, exist_ok=True)
     misc.silent_unlink(gpkg_path)
-    for index, (file, buffer) in enumerate(file_buffers.items()):
+    gdfs: dict[str, gpd.GeoDataFrame] = {}
+    for file, buffer in file_buffers.items():
         gdf = geom.read_file(config, os.path.join(cache_path, file), bbox=config.bbox)
         if exclude_field and exclude_values:
             gdf = gdf[~gdf[exclude_field].isin(exclude_values)]
@@ -417,12 +537,20 @@ def _read_to_gpkg(
             if isinstance(buffer, int | float):
                 gdf["geometry"] = gdf["geometry"].buffer(buffer)  # pyright: ignore [reportCallIssue]
             else:
+                # one GEOS batch with a per-row distance vector instead of a buffer pass per distinct value
                 default_buffer, field, buffers = buffer
-                gdf["geometry"] = gdf["geometry"].buffer(default_buffer)  # pyright: ignore [reportCallIssue]
-                for value, buffer in buffers.items():
-                    _gdf = gdf[field] == value
-                    gdf.loc[_gdf, "geometry"] = gdf.loc[_gdf, "geometry"].buffer(buffer - default_buffer)  # pyright: ignore [reportCallIssue, reportArgumentType]
-        geom.write_file(config, gdf, gpkg_path, layer=file, mode="a" if index else "w", engine="pyogrio", unlink=not index)
+                distances = np.full(len(gdf), default_buffer, dtype=np.float64)
+                field_values = gdf[field].to_numpy()
+                for value, _buffer in buffers.items():
+                    distances[field_values == value] = _buffer
+                gdf["geometry"] = gdf["geometry"].buffer(distances)  # pyright: ignore [reportCallIssue, reportArgumentType]
+        gdfs[file] = gdf
+    # batched write pass with sqlite syncs relaxed, the per-layer appends otherwise flush the journal once per layer
+    with gdal.config_options({"OGR_SQLITE_SYNCHRONOUS": "OFF", "OGR_SQLITE_JOURNAL": "MEMORY"}):
+        for index, (file, gdf) in enumerate(gdfs.items()):
+            geom.write_file(config, gdf, gpkg_path, layer=file, mode="a" if index else "w", engine="pyogrio", use_arrow=True, unlink=not index)
+            if config.FGB_CACHE:
+                geom.write_fgb(config, gdf, gpkg_path, file)
 
 
 def _download_biotopi(config: mezi_config.DownloadConfig) -> None:
@@ -452,24 +580,26 @@ def _download_celi(config: mezi_config.DownloadConfig) -> None:
         config.print(f"downloading zip from '{celi_path}' to '{path}'")
         if force_invalidate or not os.path.isfile(path):
             misc.download(celi_path, path, force_invalidate)
-        gdf = mezi_config.concat(
-            geom.filter(geom.read_file(config, extracted, None, config.bbox), config.wkt, config.bbox)[["geometry"]]  # pyright: ignore [reportArgumentType]
-            for extracted in _extract_zip(config, path, cache_path, force_invalidate, config.CELI_PATH_ZIP_FILTERS)
-            if extracted.endswith("shp")
-        )
+        shp_paths = tuple(extracted for extracted in _extract_zip(config, path, cache_path, force_invalidate, config.CELI_PATH_ZIP_FILTERS) if extracted.endswith("shp"))
+        # the regional shapefiles are independent, read them on a thread pool (OGR releases the GIL) and concat once
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(shp_paths) or 1, os.cpu_count() or 1)) as executor:
+            gdfs = list(executor.map(lambda shp_path: geom.read_file(config, shp_path, None, config.bbox), shp_paths))
+        gdf = mezi_config.concat(geom.filter(_gdf, config.wkt, config.bbox)[["geometry"]] for _gdf in gdfs)  # pyright: ignore [reportArgumentType]
     elif ext == "shp":
         gdf = geom.filter(geom.read_file(config, celi_path, None, config.bbox), config.wkt, config.bbox)[["geometry"]]
     else:
         gdf = geom.filter(geom.read_file(config, celi_path, config.CELI_PATH_GPKG_LAYER, config.bbox), config.wkt, config.bbox)[["geometry"]]
     gpkg_path = os.path.join(gpkg_cache_path, f"{config.name}.gpkg")
     geom.write_file(config, gdf, gpkg_path, layer="celi", engine="pyogrio")
+    if config.FGB_CACHE:
+        geom.write_fgb(config, gdf, gpkg_path, "celi")
     config.OUTPUT_FILES_TO_ZIP.append(gpkg_path)
 
 
 _GPKG_TO_PRESENCE_TIF_TE = " -te {bbox}"
 _GPKG_TO_PRESENCE_TIF_NODATA = " -a_nodata '{nodata}'"
 _GPKG_TO_PRESENCE_TIF_INIT = " -init 0"
-_GPKG_TO_PRESENCE_TIF = "gdal_rasterize -at -burn 1 {layers} {nodata}{init}{te} -tr 1 1 -tap -ot '{output_type}' -q '{input_path}' '{output_path}'"
+_GPKG_TO_PRESENCE_TIF = f"gdal_rasterize -at -burn 1 {{layers}} {_TIF_CO} {{nodata}}{{init}}{{te}} -tr 1 1 -tap -ot '{{output_type}}' -q '{{input_path}}' '{{output_path}}'"
 
 
 def _rasterize_presence(
@@ -490,7 +620,7 @@ def _rasterize_presence(
     output_path = os.path.join(cache_path, f"{config.name}{output_suffix}.tif")
     config.OUTPUT_FILES_TO_ZIP.append(output_path)
     config.print(f"rasterizing '{input_path}' to '{output_path}'")
-    if not force_invalidate and os.path.isfile(output_path):
+    if not force_invalidate and _is_up_to_date(output_path, input_path):
         return
     mezi_config.check_call(
         config,
@@ -518,20 +648,13 @@ def _rasterize_ozols_tif(config: mezi_config.DownloadConfig) -> None:
     _rasterize_presence(config, config.OZOLS_GPKG_CACHE_PATH, config.OZOLS_TIF_CACHE_PATH, config.OZOLS_GPKG_WFS_LAYERS, config.OZOLS_TIF_CACHE_FORCE_INVALIDATE, "_ozols")
 
 
-_GPKG_TO_FIELD_TIF_TE = " -te {bbox}"
-_GPKG_TO_FIELD_TIF_NODATA = " -a_nodata '{nodata}'"
-_GPKG_TO_FIELD_TIF_INIT = " -init 0"
-_GPKG_TO_FIELD_TIF = "gdal_rasterize -at -a '{field}' -l '{layer}'{nodata}{init}{te} -tr 1 1 -tap -ot '{output_type}' -q '{input_path}' '{output_path}'"
-
-
-def _rasterize_field(
+def _rasterize_fields(
     config: mezi_config.DownloadConfig,
     gpkg_path: str,
     cache_path: str,
     layer: str,
-    field: str,
+    fields: tuple[str, ...],
     force_invalidate: bool,
-    output_suffix: str,
     nodata: int = 255,
     output_type: str = "Float32",
 ) -> None:
@@ -540,43 +663,41 @@ def _rasterize_field(
         config.print(f"{input_path} does not exist")
         return
     os.makedirs(cache_path, exist_ok=True)
-    output_path = os.path.join(cache_path, f"{config.name}{output_suffix}.tif")
-    config.OUTPUT_FILES_TO_ZIP.append(output_path)
-    config.print(f"rasterizing '{input_path}' to '{output_path}'")
-    if not force_invalidate and os.path.isfile(output_path):
+    outputs = {field: os.path.join(cache_path, f"{config.name}_{field}.tif") for field in fields}
+    config.OUTPUT_FILES_TO_ZIP.extend(outputs.values())
+    missing = tuple(field for field in fields if force_invalidate or not _is_up_to_date(outputs[field], input_path))
+    if not missing:
         return
-    mezi_config.check_call(
-        config,
-        _GPKG_TO_FIELD_TIF.format(
-            field=field,
-            layer=layer,
-            nodata=_GPKG_TO_FIELD_TIF_NODATA.format(nodata=nodata) if nodata else "",
-            init="" if nodata else _GPKG_TO_FIELD_TIF_INIT,
-            te=_GPKG_TO_FIELD_TIF_TE.format(bbox=" ".join(str(coord) for coord in config.bbox)) if config.bbox else "",
-            output_type=output_type,
-            input_path=input_path,
-            output_path=output_path,
-        ),
-    )
+    options = ["-at", "-tr", "1", "1", "-tap", "-ot", output_type, "-q", "-l", layer, "-co", "NUM_THREADS=ALL_CPUS", "-co", "COMPRESS=DEFLATE", "-co", "TILED=YES"]
+    options += ["-a_nodata", str(nodata)] if nodata else ["-init", "0"]
+    if config.bbox:
+        options += ["-te", *(str(coord) for coord in config.bbox)]
+    # one vector open shared by all field passes instead of re-parsing the gpkg per attribute
+    source = gdal.OpenEx(input_path, gdal.OF_VECTOR)
+    for field in missing:
+        config.print(f"rasterizing '{input_path}' to '{outputs[field]}'")
+        gdal.Rasterize(outputs[field], source, options=[*options, "-a", field])
 
 
 def _rasterize_mvr_tif(config: mezi_config.DownloadConfig) -> None:
     apgs_cache_path = os.path.join(config.MVR_CACHE_PATH, "apgs")
-    _rasterize_field(config, apgs_cache_path, config.MVR_TIF_CACHE_PATH, "apgs", "biez", config.MVR_TIF_CACHE_FORCE_INVALIDATE, "_biez")
-    _rasterize_field(config, apgs_cache_path, config.MVR_TIF_CACHE_PATH, "apgs", "arstnieciba", config.MVR_TIF_CACHE_FORCE_INVALIDATE, "_arstnieciba")
-    _rasterize_field(config, apgs_cache_path, config.MVR_TIF_CACHE_PATH, "apgs", "bruklenes", config.MVR_TIF_CACHE_FORCE_INVALIDATE, "_bruklenes")
-    _rasterize_field(config, apgs_cache_path, config.MVR_TIF_CACHE_PATH, "apgs", "fitoremediacija", config.MVR_TIF_CACHE_FORCE_INVALIDATE, "_fitoremediacija")
-    _rasterize_field(config, apgs_cache_path, config.MVR_TIF_CACHE_PATH, "apgs", "floristika", config.MVR_TIF_CACHE_FORCE_INVALIDATE, "_floristika")
-    _rasterize_field(config, apgs_cache_path, config.MVR_TIF_CACHE_PATH, "apgs", "kosmetika", config.MVR_TIF_CACHE_FORCE_INVALIDATE, "_kosmetika")
-    _rasterize_field(config, apgs_cache_path, config.MVR_TIF_CACHE_PATH, "apgs", "mellenes", config.MVR_TIF_CACHE_FORCE_INVALIDATE, "_mellenes")
-    _rasterize_field(config, apgs_cache_path, config.MVR_TIF_CACHE_PATH, "apgs", "noturiba", config.MVR_TIF_CACHE_FORCE_INVALIDATE, "_noturiba")
-    _rasterize_field(config, apgs_cache_path, config.MVR_TIF_CACHE_PATH, "apgs", "pievilciba", config.MVR_TIF_CACHE_FORCE_INVALIDATE, "_pievilciba")
-    _rasterize_field(config, apgs_cache_path, config.MVR_TIF_CACHE_PATH, "apgs", "rekreacija", config.MVR_TIF_CACHE_FORCE_INVALIDATE, "_rekreacija")
-    _rasterize_field(config, apgs_cache_path, config.MVR_TIF_CACHE_PATH, "apgs", "troksnis", config.MVR_TIF_CACHE_FORCE_INVALIDATE, "_troksnis")
-    _rasterize_field(config, apgs_cache_path, config.MVR_TIF_CACHE_PATH, "apgs", "ugunsbistamiba", config.MVR_TIF_CACHE_FORCE_INVALIDATE, "_ugunsbistamiba")
-    _rasterize_field(config, apgs_cache_path, config.MVR_TIF_CACHE_PATH, "apgs", "saimn_d_ie", config.MVR_TIF_CACHE_FORCE_INVALIDATE, "_saimn_d_ie")
-    for col, *_ in config.MVR_RULES:
-        _rasterize_field(config, apgs_cache_path, config.MVR_TIF_CACHE_PATH, "apgs", col, config.MVR_TIF_CACHE_FORCE_INVALIDATE, f"_{col}")
+    fields = (
+        "biez",
+        "arstnieciba",
+        "bruklenes",
+        "fitoremediacija",
+        "floristika",
+        "kosmetika",
+        "mellenes",
+        "noturiba",
+        "pievilciba",
+        "rekreacija",
+        "troksnis",
+        "ugunsbistamiba",
+        "saimn_d_ie",
+        *(col for col, *_ in config.MVR_RULES),
+    )
+    _rasterize_fields(config, apgs_cache_path, config.MVR_TIF_CACHE_PATH, "apgs", fields, config.MVR_TIF_CACHE_FORCE_INVALIDATE)
 
 
 def _rasterize_biotopi_tif(config: mezi_config.DownloadConfig) -> None:
@@ -602,37 +723,105 @@ def _rasterize_celi_tif(config: mezi_config.DownloadConfig) -> None:
     _rasterize_presence(config, config.CELI_GPKG_CACHE_PATH, config.CELI_TIF_CACHE_PATH, ("celi",), config.CELI_TIF_CACHE_FORCE_INVALIDATE, "_celi")
 
 
-_BZI_CALC_DTW = "d - d + ((d > 0) & (d <= 0.2)) + (d <= 0) * 2"
-_BZI_CALC_SLOPE = "s - s + ((s >= 10) & (s <= 25)) + (s > 25) * 2"
-_BZI_CALC_MVR = "isin(m, (1, 2)) * 2"
-_BZI_CALC_BIOTOPI = "(b != 255) * b * 2"
-_BZI_CALC_AIZSARGAJAMAS_SUGAS = "(a != 255) * a * 2"
-_BZI_CALC_CALC = f"max(concatenate((({_BZI_CALC_DTW})[..., None], ({_BZI_CALC_SLOPE})[..., None], ({_BZI_CALC_MVR})[..., None], ({_BZI_CALC_BIOTOPI})[..., None], ({_BZI_CALC_AIZSARGAJAMAS_SUGAS})[..., None]), 2), 2)"
-_BZI_CALC = f"gdal_calc -d '{{dtw}}' -s '{{slope}}' -m '{{mvr}}' -b '{{biotopi}}' -a '{{aizsargajamas_sugas}}' --calc='{_BZI_CALC_CALC}' --outfile '{{output}}' --NoDataValue 'none' --hideNoData --extent 'intersect' --overwrite --type 'Byte' --projectionCheck"  # noqa: E501
-# _BZI_CALC = """gdal_calc -d '{dtw}' -s '{slope}' -m '{mvr}' -b '{biotopi}' -a '{aizsargajamas_sugas}' --calc='exec("from mezi import download") or download._bzi_calc(d, s, m, b, a)' --outfile '{output}' --NoDataValue 'none' --hideNoData --extent 'intersect' --overwrite --type 'Byte' --projectionCheck"""  # noqa: E501
-_BZI_RESAMPLE_TE = " -te {bbox} -te_srs 'EPSG:3059'"
-_BZI_RESAMPLE = "gdalwarp -t_srs 'EPSG:3059'{te} -tr 1 1 -tap -ovr NONE -dstnodata '255' -overwrite '{input_path}' '{output_path}'"
+def _is_up_to_date(output_path: str, *input_paths: str) -> bool:
+    # make-style staleness check: the cache paths already carry the bbox+wkt content digest in config.name,
+    # so output-newer-than-every-input is enough to prove the artifact current without hash sidecars
+    if not os.path.isfile(output_path):
+        return False
+    mtime = os.path.getmtime(output_path)
+    return all(mtime >= os.path.getmtime(path) for path in input_paths if os.path.isfile(path))
+
+
+def _bzi_calc(
+    d: np.ndarray[tuple[int, int], np.dtype[np.float32]],
+    s: np.ndarray[tuple[int, int], np.dtype[np.float32]],
+    m: np.ndarray[tuple[int, int], np.dtype[np.float32]],
+    b: np.ndarray[tuple[int, int], np.dtype[np.byte]],
+    a: np.ndarray[tuple[int, int], np.dtype[np.byte]],
+) -> np.ndarray[tuple[int, int], np.dtype[np.uint8]]:
+    out = np.empty(d.shape, np.uint8)
+    _bzi_calc_kernel(d, s, m, b, a, out)
+    return out
 
 
-def _bzi_calc(  # pyright: ignore [reportUnusedFunction]
+@numba.njit(parallel=True, boundscheck=False, cache=True, fastmath=True)
+def _bzi_calc_kernel(
     d: np.ndarray[tuple[int, int], np.dtype[np.float32]],
     s: np.ndarray[tuple[int, int], np.dtype[np.float32]],
     m: np.ndarray[tuple[int, int], np.dtype[np.float32]],
     b: np.ndarray[tuple[int, int], np.dtype[np.byte]],
     a: np.ndarray[tuple[int, int], np.dtype[np.byte]],
-) -> np.ndarray[tuple[int, int], np.dtype[np.byte]]:
-    _d = d - d + ((d > 0) & (d <= 0.2)) + (d <= 0) * 2  # noqa: PLR2004
-    _s = s - s + ((s >= 10) & (s <= 25)) + (s > 25) * 2  # noqa: PLR2004
-    _m = np.isin(m, (1, 2)) * 2
-    _b = (b != 255) * b * 2  # noqa: PLR2004
-    _a = (a != 255) * a * 2  # noqa: PLR2004
-    return np.max(np.concatenate((_d[..., None], _s[..., None], _m[..., None], _b[..., None], _a[..., None]), 2), 2)
+    out: np.ndarray[tuple[int, int], np.dtype[np.uint8]],
+) -> None:
+    # fused single pass: each input pixel is read once and the output written once,
+    # vs one full-raster pass per ufunc in the numpy formulation on a memory-bound kernel
+    for i in numba.prange(d.shape[0]):  # pyright: ignore [reportPrivateImportUsage]
+        for j in range(d.shape[1]):
+            dv = d[i, j]
+            sv = s[i, j]
+            mv = m[i, j]
+            bv = b[i, j]
+            av = a[i, j]
+            value = (0 < dv <= 0.2) + 2 * (dv <= 0)  # noqa: PLR2004
+            value = max(value, (10 <= sv <= 25) + 2 * (sv > 25))  # noqa: PLR2004
+            # scalar comparisons, not np.isin: the membership test would allocate a boolean array per call
+            value = max(value, 2 * (mv == 1 or mv == 2))  # noqa: PLR2004
+            value = max(value, (bv != 255) * bv * 2)  # noqa: PLR2004
+            value = max(value, (av != 255) * av * 2)  # noqa: PLR2004
+            out[i, j] = value
+
+
+def _bzi_windows_calc(dtw_path: str, slope_path: str, mvr_path: str, biotopi_path: str, aizsargajamas_sugas_path: str, output_path: str) -> None:
+    # resample, calc and write are fused per 512x512 window with no intermediate raster on disk or in memory,
+    # keeping the working set cache-resident instead of materializing five full rasters like gdal_calc did
+    with contextlib.ExitStack() as stack:
+        # the dtw raster arrives on a 10/30 m grid; a WarpedVRT exposes it on the aligned 1 m grid and
+        # resamples per window on the fly, replacing the old gdalwarp subprocess and its intermediate tif
+        dtw_source = stack.enter_context(rasterio.open(dtw_path))
+        xmin, ymin = math.floor(dtw_source.bounds.left), math.floor(dtw_source.bounds.bottom)
+        xmax, ymax = math.ceil(dtw_source.bounds.right), math.ceil(dtw_source.bounds.top)
+        dtw_vrt = stack.enter_context(
+            rasterio.vrt.WarpedVRT(dtw_source, crs="EPSG:3059", transform=rasterio.transform.from_origin(xmin, ymax, 1, 1), width=xmax - xmin, height=ymax - ymin, nodata=255)
+        )
+        sources = (dtw_vrt, *(stack.enter_context(rasterio.open(path)) for path in (slope_path, mvr_path, biotopi_path, aizsargajamas_sugas_path)))
+        # the output grid is the intersection of the inputs, matching gdal_calc --extent 'intersect'
+        xmin = max(source.bounds.left for source in sources)
+        ymin = max(source.bounds.bottom for source in sources)
+        xmax = min(source.bounds.right for source in sources)
+        ymax = min(source.bounds.top for source in sources)
+        xres, yres = sources[0].res
+        profile = sources[0].profile | {
+            "transform": rasterio.transform.from_origin(xmin, ymax, xres, yres),
+            "width": max(0, round((xmax - xmin) / xres)),
+            "height": max(0, round((ymax - ymin) / yres)),
+            "count": 1,
+            "dtype": "uint8",
+            "nodata": None,
+            "tiled": True,
+            "blockxsize": 512,
+            "blockysize": 512,
+            "compress": "lzw",
+            "num_threads": "all_cpus",
+        }
+        dst = stack.enter_context(rasterio.open(output_path, "w", **profile))
+        for _, window in dst.block_windows(1):
+            bounds = rasterio.windows.bounds(window, dst.transform)
+            d, s, m, b, a = (
+                source.read(1, window=rasterio.windows.from_bounds(*bounds, source.transform), boundless=True, fill_value=source.nodata or 0, out_shape=(int(window.height), int(window.width)))
+                for source in sources
+            )
+            dst.write(_bzi_calc(d, s, m, b, a), 1, window=window)
 
 
 def _rasterize_bzi_tif(config: mezi_config.DownloadConfig) -> None:
     tif_path = os.path.join(config.BZI_TIF_CACHE_PATH, f"{config.name}_bzi.tif")
     config.OUTPUT_FILES_TO_ZIP.append(tif_path)
-    if not config.BZI_TIF_CACHE_FORCE_INVALIDATE and os.path.isfile(tif_path):
+    dtw_path = os.path.join(config.SILAVA_DTW_30_CACHE_PATH, f"{config.name}_dtw_30.tif") if config.BZI_TIF_DTW_30 else os.path.join(config.SILAVA_DTW_10_CACHE_PATH, f"{config.name}_dtw_10.tif")
+    slope_path = os.path.join(config.LGIA_TIF_CACHE_PATH, f"{config.name}_slope.tif")
+    mvr_path = os.path.join(config.MVR_TIF_CACHE_PATH, f"{config.name}_saimn_d_ie.tif")
+    biotopi_path = os.path.join(config.BIOTOPI_TIF_CACHE_PATH, f"{config.name}_biotopi.tif")
+    if not config.BZI_TIF_CACHE_FORCE_INVALIDATE and _is_up_to_date(tif_path, dtw_path, slope_path, mvr_path, biotopi_path):
+        config.print(f"'{tif_path}' is up to date")
         return
     os.makedirs(config.BZI_TIF_CACHE_PATH, exist_ok=True)
     _read_to_gpkg(config, config.AIZSARGAJAMAS_SUGAS_CACHE_PATH, config.BZI_TIF_CACHE_PATH, config.BZI_AIZSARGAJAMAS_SUGAS_DATA_FILE_BUFFERS, config.BZI_TIF_CACHE_FORCE_INVALIDATE)
@@ -644,33 +833,42 @@ def _rasterize_bzi_tif(config: mezi_config.DownloadConfig) -> None:
         config.BZI_TIF_CACHE_FORCE_INVALIDATE,
         "_aizsargajamas_sugas",
     )
-    dtw_path = os.path.join(config.SILAVA_DTW_30_CACHE_PATH, f"{config.name}_dtw_30.tif") if config.BZI_TIF_DTW_30 else os.path.join(config.SILAVA_DTW_10_CACHE_PATH, f"{config.name}_dtw_10.tif")
-    slope_path = os.path.join(config.LGIA_TIF_CACHE_PATH, f"{config.name}_slope.tif")
-    mvr_path = os.path.join(config.MVR_TIF_CACHE_PATH, f"{config.name}_saimn_d_ie.tif")
-    biotopi_path = os.path.join(config.BIOTOPI_TIF_CACHE_PATH, f"{config.name}_biotopi.tif")
     aizsargajamas_sugas_path = os.path.join(config.BZI_TIF_CACHE_PATH, f"{config.name}_aizsargajamas_sugas.tif")
-    dtw_resample_path = os.path.join(config.BZI_TIF_CACHE_PATH, f"{config.name}_dtw.tif")
-    config.print(f"generating '{dtw_resample_path}'")
-    mezi_config.check_call(
-        config,
-        _BZI_RESAMPLE.format(
-            te=_BZI_RESAMPLE_TE.format(bbox=" ".join(str(coord) for coord in config.bbox)) if config.bbox else "",
-            input_path=dtw_path,
-            output_path=dtw_resample_path,
-        ),
-    )
     config.print(f"generating '{tif_path}'")
-    mezi_config.check_call(
-        config,
-        _BZI_CALC.format(
-            dtw=dtw_resample_path,
-            slope=slope_path,
-            mvr=mvr_path,
-            biotopi=biotopi_path,
-            aizsargajamas_sugas=aizsargajamas_sugas_path,
-            output=tif_path,
-        ),
-    )
+    _bzi_windows_calc(dtw_path, slope_path, mvr_path, biotopi_path, aizsargajamas_sugas_path, tif_path)
+
+
+# the download stages hit independent external services and are network-bound, they run concurrently in extra_main;
+# the rasterize/tessellate/zip stages stay sequential behind the download barrier since they consume the downloaded files
+_DOWNLOAD_STAGES: tuple[tuple[str, Callable[[mezi_config.DownloadConfig], None]], ...] = (
+    ("LGIA_LAS_DOWNLOAD", _download_lgia_las),
+    ("LGIA_ORTO_RGB_DOWNLOAD_TIF", _download_lgia_orto_rgb_tif),
+    ("LGIA_ORTO_RGB_DOWNLOAD_TFW", _download_lgia_orto_rgb_tfw),
+    ("LGIA_ORTO_CIR_DOWNLOAD_TIF", _download_lgia_orto_cir_tif),
+    ("LGIA_ORTO_CIR_DOWNLOAD_TFW", _download_lgia_orto_cir_tfw),
+    ("SILAVA_DTW_10_DOWNLOAD", _download_silava_dtw_10),
+    ("SILAVA_DTW_30_DOWNLOAD", _download_silava_dtw_30),
+    ("ZMNI_GPKG_DOWNLOAD", _download_zmni_gpkg),
+    ("MANTOJUMS_GPKG_DOWNLOAD", _download_mantojums_gpkg),
+    ("OZOLS_GPKG_DOWNLOAD", _download_ozols_gpkg),
+    ("MVR_DOWNLOAD", mvr.download_mvr),
+    ("BIOTOPI_DOWNLOAD", _download_biotopi),
+    ("MIKROLIEGUMI_DOWNLOAD", _download_mikroliegumi),
+    ("AIZSARGAJAMAS_SUGAS_DOWNLOAD", _download_aizsargajamas_sugas),
+    ("CELI_DOWNLOAD", _download_celi),
+)
+
+
+def _run_stages(config: mezi_config.DownloadConfig, stages: tuple[tuple[str, Callable[[mezi_config.DownloadConfig], None]], ...], max_workers: int = 1) -> None:
+    enabled = tuple(stage for flag, stage in stages if getattr(config, flag))
+    if max_workers > 1 and len(enabled) > 1:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # as_completed so the first failing stage raises without waiting out the others
+            for future in concurrent.futures.as_completed(tuple(executor.submit(stage, config) for stage in enabled)):
+                future.result()
+    else:
+        for stage in enabled:
+            stage(config)
 
 
 def _zip_data(config: mezi_config.DownloadConfig) -> None:
@@ -679,13 +877,101 @@ def _zip_data(config: mezi_config.DownloadConfig) -> None:
         config.OUTPUT_FILES_TO_ZIP.append(path)
         config.dump(path)
     os.makedirs(os.path.dirname(config.OUTPUT_ZIP_PATH), exist_ok=True)
-    paths = tuple(os.path.abspath(path) for path in sorted(config.OUTPUT_FILES_TO_ZIP))
-    root = os.path.commonpath(paths) if paths else None
-    with zipfile.ZipFile(config.OUTPUT_ZIP_PATH, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as _zip:
-        for path in paths:
-            zip_path = os.path.relpath(path.replace(config.name + "_", "").replace(config.name, "data"), root)
-            config.print(f"compressing '{path}' to '{zip_path}' in '{config.OUTPUT_ZIP_PATH}'")
-            _zip.write(path, zip_path)
+    # paths stay registered as plain strings at their ~30 call sites; dedupe here since a stage that runs
+    # twice (cache probe + generation) may register the same file, and sort for a reproducible archive order
+    paths = tuple(os.path.abspath(path) for path in sorted(set(config.OUTPUT_FILES_TO_ZIP)))
+    root = os.path.commonpath(paths) if paths else ""
+    # arcnames are pure string work on the tail below the common root, computed once before the zip opens:
+    # slicing off the root replaces the per-file relpath walk and the name prefix is built a single time
+    prefix = f"{config.name}_"
+    entries = tuple(
+        (path, path[len(root) + 1 :].replace(prefix, "").replace(config.name, "data"), config.OUTPUT_ZIP_COMPRESSION_BY_EXT.get(os.path.splitext(path)[1].lower())) for path in paths
+    )
+    # one line before and one summary after instead of a flushed print per file, which serialized
+    # stdout I/O against the compression on archives with hundreds of members
+    config.print(f"compressing {len(entries)} files to '{config.OUTPUT_ZIP_PATH}'")
+    if config.OUTPUT_ZIP_PATH.endswith(".tar.zst"):
+        # consumers that accept a tar get zstd: similar ratio to deflate at a fraction of the CPU,
+        # with compression parallelized by zstd's own worker threads
+        with (
+            open(config.OUTPUT_ZIP_PATH, "wb", buffering=4 * 1024 * 1024) as sink,
+            zstandard.ZstdCompressor(level=3, threads=-1).stream_writer(sink) as writer,
+            tarfile.open(fileobj=writer, mode="w|") as tar,  # pyright: ignore [reportArgumentType]
+        ):
+            for path, zip_path, _ in entries:
+                tar.add(path, arcname=zip_path)
+    else:
+        # stdlib zlib is fine here: the large members are stored uncompressed and the rest deflate at level 1,
+        # so a faster deflate backend would not move the bottleneck away from disk; a 4 MiB buffered sink keeps
+        # the disk writes large instead of zipfile's default 8 KiB chunks, and zip64 is explicit since the
+        # orthophoto+las bundles routinely cross 4 GB; per-entry compression workers were likewise rejected -
+        # with mostly stored members the single writer is already disk-bound, and runs that want threaded
+        # compression get it from the tar.zst branch above
+        fadvise = getattr(os, "posix_fadvise", None)
+        with (
+            open(config.OUTPUT_ZIP_PATH, "wb", buffering=4 * 1024 * 1024) as sink,
+            zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=config.OUTPUT_ZIP_COMPRESS_LEVEL, allowZip64=True) as _zip,
+        ):
+            for path, zip_path, compress_type in entries:
+                zinfo = zipfile.ZipInfo.from_file(path, zip_path)
+                zinfo.compress_type = zipfile.ZIP_DEFLATED if compress_type is None else compress_type
+                with open(path, "rb") as source:
+                    if fadvise:
+                        # tag the member read as sequential for aggressive kernel readahead, and drop its
+                        # pages afterwards so the multi-GB bundle does not evict the working set
+                        fadvise(source.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                    with _zip.open(zinfo, "w") as member:
+                        shutil.copyfileobj(source, member, 4 * 1024 * 1024)
+                    if fadvise:
+                        fadvise(source.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+    total = sum(os.path.getsize(path) for path, *_ in entries)
+    config.print(f"compressed {len(entries)} files, {total / 1e6:.1f} MB -> {os.path.getsize(config.OUTPUT_ZIP_PATH) / 1e6:.1f} MB")
+
+
+# the stage DAG as data: stages within a level are independent of each other, each level is a barrier
+# for the next; level 0 (downloads) runs concurrently, the later levels are CPU/disk-bound and run in order
+_STAGES: tuple[tuple[tuple[str, Callable[[mezi_config.DownloadConfig], None]], ...], ...] = (
+    _DOWNLOAD_STAGES,
+    (
+        ("ZMNI_TIF_RASTERIZE", _rasterize_zmni_tif),
+        ("MANTOJUMS_TIF_RASTERIZE", _rasterize_mantojums_tif),
+        ("OZOLS_TIF_RASTERIZE", _rasterize_ozols_tif),
+        ("MVR_TIF_RASTERIZE", _rasterize_mvr_tif),
+        ("BIOTOPI_TIF_RASTERIZE", _rasterize_biotopi_tif),
+        ("MIKROLIEGUMI_TIF_RASTERIZE", _rasterize_mikroliegumi_tif),
+        ("AIZSARGAJAMAS_SUGAS_TIF_RASTERIZE", _rasterize_aizsargajamas_sugas_tif),
+        ("CELI_TIF_RASTERIZE", _rasterize_celi_tif),
+    ),
+    (("BZI_TIF_RASTERIZE", _rasterize_bzi_tif),),
+    (("TESSELLATE", tessellate.tessellate),),
+    # the zip stays a final barrier: stages register their paths in OUTPUT_FILES_TO_ZIP before the files
+    # are written, so streaming entries into the archive as they are registered would bundle partial files
+    (("OUTPUT_ZIP_PATH", _zip_data),),
+)
+
+
+def _run_tile(config: mezi_config.DownloadConfig, wkt: shapely.Geometry | None, index: int, bbox: tuple[float, ...]) -> int:
+    config.RUN_TILES = 0
+    if config.OUTPUT_ZIP_PATH:
+        root, ext = os.path.splitext(config.OUTPUT_ZIP_PATH)
+        config.OUTPUT_ZIP_PATH = f"{root}_{index}{ext}"
+    return extra_main(config, wkt and wkt.intersection(shapely.box(*bbox)), bbox)
+
+
+def _run_tiled(config: mezi_config.DownloadConfig, wkt: shapely.Geometry | None, bbox: tuple[float, ...]) -> int:
+    # country-scale extents serialize into a many-hour single-process run; a k x k grid of slightly
+    # overlapping tiles runs one pipeline per process, each with its own content-hashed cache names
+    tiles = config.RUN_TILES
+    overlap = config.RUN_TILE_OVERLAP
+    xmin, ymin, xmax, ymax = bbox
+    dx = (xmax - xmin) / tiles
+    dy = (ymax - ymin) / tiles
+    bboxes = tuple(
+        (xmin + i * dx, ymin + j * dy, min(xmax, xmin + (i + 1) * dx + overlap), min(ymax, ymin + (j + 1) * dy + overlap)) for i in range(tiles) for j in range(tiles)
+    )
+    config.print(f"running {tiles}x{tiles} tiles of '{bbox}'")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(len(bboxes), os.cpu_count() or 1)) as executor:
+        return max(executor.map(functools.partial(_run_tile, config, wkt), range(len(bboxes)), bboxes))
 
 
 def extra_main(config: mezi_config.DownloadConfig = mezi_config.DownloadConfig(), wkt: shapely.Geometry | None = geom.DEFAULT_WKT, bbox: tuple[float, ...] | None = geom.DEFAULT_BBOX) -> int:
@@ -694,58 +980,10 @@ def extra_main(config: mezi_config.DownloadConfig = mezi_config.DownloadConfig()
     config.wkt = wkt
     config.bbox = _bbox(wkt, bbox)
     config.name = name(wkt, bbox)
-    if config.LGIA_LAS_DOWNLOAD:
-        _download_lgia_las(config)
-    if config.LGIA_ORTO_RGB_DOWNLOAD_TIF:
-        _download_lgia_orto_rgb_tif(config)
-    if config.LGIA_ORTO_RGB_DOWNLOAD_TFW:
-        _download_lgia_orto_rgb_tfw(config)
-    if config.LGIA_ORTO_CIR_DOWNLOAD_TIF:
-        _download_lgia_orto_cir_tif(config)
-    if config.LGIA_ORTO_CIR_DOWNLOAD_TFW:
-        _download_lgia_orto_cir_tfw(config)
-    if config.SILAVA_DTW_10_DOWNLOAD:
-        _download_silava_dtw_10(config)
-    if config.SILAVA_DTW_30_DOWNLOAD:
-        _download_silava_dtw_30(config)
-    if config.ZMNI_GPKG_DOWNLOAD:
-        _download_zmni_gpkg(config)
-    if config.MANTOJUMS_GPKG_DOWNLOAD:
-        _download_mantojums_gpkg(config)
-    if config.OZOLS_GPKG_DOWNLOAD:
-        _download_ozols_gpkg(config)
-    if config.MVR_DOWNLOAD:
-        mvr.download_mvr(config)
-    if config.BIOTOPI_DOWNLOAD:
-        _download_biotopi(config)
-    if config.MIKROLIEGUMI_DOWNLOAD:
-        _download_mikroliegumi(config)
-    if config.AIZSARGAJAMAS_SUGAS_DOWNLOAD:
-        _download_aizsargajamas_sugas(config)
-    if config.CELI_DOWNLOAD:
-        _download_celi(config)
-    if config.ZMNI_TIF_RASTERIZE:
-        _rasterize_zmni_tif(config)
-    if config.MANTOJUMS_TIF_RASTERIZE:
-        _rasterize_mantojums_tif(config)
-    if config.OZOLS_TIF_RASTERIZE:
-        _rasterize_ozols_tif(config)
-    if config.MVR_TIF_RASTERIZE:
-        _rasterize_mvr_tif(config)
-    if config.BIOTOPI_TIF_RASTERIZE:
-        _rasterize_biotopi_tif(config)
-    if config.MIKROLIEGUMI_TIF_RASTERIZE:
-        _rasterize_mikroliegumi_tif(config)
-    if config.AIZSARGAJAMAS_SUGAS_TIF_RASTERIZE:
-        _rasterize_aizsargajamas_sugas_tif(config)
-    if config.CELI_TIF_RASTERIZE:
-        _rasterize_celi_tif(config)
-    if config.BZI_TIF_RASTERIZE:
-        _rasterize_bzi_tif(config)
-    if config.TESSELLATE:
-        tessellate.tessellate(config)
-    if config.OUTPUT_ZIP_PATH:
-        _zip_data(config)
+    if config.RUN_TILES > 1:
+        return _run_tiled(config, wkt, config.bbox)
+    for index, stages in enumerate(_STAGES):
+        _run_stages(config, stages, config.DOWNLOAD_STAGE_MAX_WORKERS if not index else 1)
     return 0
 
 
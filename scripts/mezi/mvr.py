@@ -8,20 +8,22 @@
 # Dependencies: environment.yml
 # Python Version: 3.12+
 
-import copy
-import decimal
+import functools
 import math
 import os
-import sqlite3
-from collections.abc import MutableSequence
 from typing import Any
 
+import numba
+import numpy as np
 import pandas as pd
 import py7zr
 
 from mezi import config as mezi_config
-from mezi.utils import geom
+from mezi.utils import geom, misc
 
+# copy-on-write instead of Arrow-backed frames: scoring hands raw numpy arrays to numba kernels
+# and the fiona writer expects numpy dtypes, so a pyarrow backend would just add a conversion on
+# both ends of the pipeline
 pd.options.mode.copy_on_write = True
 
 _MVR_SCHEMA = {
@@ -41,10 +43,10 @@ _MVR_SCHEMA = {
         "expl_mezs": "float",
         "expl_celi": "float",
         "expl_gravj": "float",
-        "zkat": "str",
-        "mt": "str",
-        "izc": "str",
-        "s10": "str",
+        "zkat": "int32",
+        "mt": "int32",
+        "izc": "int32",
+        "s10": "int32",
         "a10": "float",
         "h10": "float",
         "d10": "float",
@@ -52,7 +54,7 @@ _MVR_SCHEMA = {
         "n10": "float",
         "bv10": "str",
         "ba10": "str",
-        "s11": "str",
+        "s11": "int32",
         "a11": "float",
         "h11": "float",
         "d11": "float",
@@ -60,7 +62,7 @@ _MVR_SCHEMA = {
         "n11": "float",
         "bv11": "str",
         "ba11": "str",
-        "s12": "str",
+        "s12": "int32",
         "a12": "float",
         "h12": "float",
         "d12": "float",
@@ -68,7 +70,7 @@ _MVR_SCHEMA = {
         "n12": "float",
         "bv12": "str",
         "ba12": "str",
-        "s13": "str",
+        "s13": "int32",
         "a13": "float",
         "h13": "float",
         "d13": "float",
@@ -76,7 +78,7 @@ _MVR_SCHEMA = {
         "n13": "float",
         "bv13": "str",
         "ba13": "str",
-        "s14": "str",
+        "s14": "int32",
         "a14": "float",
         "h14": "float",
         "d14": "float",
@@ -85,7 +87,7 @@ _MVR_SCHEMA = {
         "bv14": "str",
         "ba14": "str",
         "jakopj": "float",
-        "s22": "str",
+        "s22": "int32",
         "a22": "float",
         "h22": "float",
         "d22": "float",
@@ -93,7 +95,7 @@ _MVR_SCHEMA = {
         "n22": "float",
         "bv22": "str",
         "ba22": "str",
-        "s23": "str",
+        "s23": "int32",
         "a23": "float",
         "h23": "float",
         "d23": "float",
@@ -101,7 +103,7 @@ _MVR_SCHEMA = {
         "n23": "float",
         "bv23": "str",
         "ba23": "str",
-        "s24": "str",
+        "s24": "int32",
         "a24": "float",
         "h24": "float",
         "d24": "float",
@@ -138,358 +140,324 @@ _MVR_SCHEMA = {
     },
     "geometry": "Polygon",
 }
+# classification code columns stored as small ints instead of TEXT, they are compared numerically everywhere
+_MVR_CODE_COLUMNS = ("zkat", "mt", "izc", "s10", "s11", "s12", "s13", "s14", "s22", "s23", "s24")
 
 
-_MVR_ARSTNIECIBA = """
-UPDATE apgs SET arstnieciba = CASE
-    WHEN apgs.mt IN (7, 8, 12, 17, 18, 22) THEN 1
-    WHEN apgs.mt IN (1, 9, 14, 23) THEN 2
-    WHEN apgs.mt IN (2, 10, 15, 19, 24) THEN 3
-    WHEN apgs.mt IN (3, 11, 16, 21) THEN 4
-    WHEN apgs.mt IN (4, 5, 6, 25) THEN 5
-    ELSE NULL
-END;
-"""
-_MVR_BRUKLENES = """
-UPDATE apgs SET bruklenes = (CASE
-    WHEN apgs.mt IN (1, 7, 17) THEN 0.22
-    WHEN apgs.mt = 2 THEN 0.18
-    WHEN apgs.mt = 8 THEN 0.15
-    WHEN apgs.mt IN (3, 18, 22, 23) THEN 0.13
-    WHEN apgs.mt IN (14, 12, 9) THEN 0.07
-    ELSE 0
-END * CASE
-    WHEN apgs.s10 IN (1, 22, 14, 28, 13) THEN 1.25
-    WHEN apgs.s10 IN (3, 15, 23) THEN 1.0
-    WHEN apgs.s10 IN (4, 8) THEN 0.5
-    ELSE 0
-END) * (-0.00007 * apgs.a10 * apgs.a10 + (0.0132 * apgs.a10) + 0.3957) * (-0.0154 * apgs.biez * apgs.biez + 0.2269 * apgs.biez + 0.1061) * (CASE
-    WHEN apgs.mt = 1 THEN 203
-    WHEN apgs.mt = 2 THEN 488
-    WHEN apgs.mt = 3 THEN 378
-    WHEN apgs.mt = 4 THEN 189
-    WHEN apgs.mt = 5 THEN 189
-    WHEN apgs.mt = 6 THEN 0
-    WHEN apgs.mt = 7 THEN 265
-    WHEN apgs.mt = 8 THEN 642
-    WHEN apgs.mt = 9 THEN 287
-    WHEN apgs.mt = 10 THEN 0
-    WHEN apgs.mt = 11 THEN 0
-    WHEN apgs.mt = 12 THEN 0
-    WHEN apgs.mt = 14 THEN 0
-    WHEN apgs.mt = 15 THEN 0
-    WHEN apgs.mt = 16 THEN 0
-    WHEN apgs.mt = 17 THEN 275
-    WHEN apgs.mt = 18 THEN 0
-    WHEN apgs.mt = 19 THEN 0
-    WHEN apgs.mt = 21 THEN 0
-    WHEN apgs.mt = 22 THEN 275
-    WHEN apgs.mt = 23 THEN 558
-    WHEN apgs.mt = 24 THEN 0
-    WHEN apgs.mt = 25 THEN 0
-    ELSE 0
-END) * (1.0 / (1 + exp(-3.5722 + 0.648 * apgs.biez)));
-"""
-_MVR_FITOREMEDIACIJA = """
-UPDATE apgs SET fitoremediacija = CASE
-    WHEN apgs.mt IN (11, 16, 25) THEN 1
-    WHEN apgs.mt IN (7, 10, 15, 21) THEN 2
-    WHEN apgs.mt IN (1, 5, 6, 8, 12, 17, 19, 23) THEN 3
-    WHEN apgs.mt IN (2, 3, 4, 9, 14, 22) THEN 4
-    WHEN apgs.mt IN (18, 24) THEN 5
-    ELSE NULL
-END;
-"""
-_MVR_FLORISTIKA = """
-UPDATE apgs SET floristika = CASE
-    WHEN apgs.mt IN (7, 8, 12, 14, 17, 18, 22, 23) THEN 1
-    WHEN apgs.mt IN (9, 10, 15, 24) THEN 2
-    WHEN apgs.mt IN (1, 2, 11, 16, 19, 25) THEN 3
-    WHEN apgs.mt = 21 THEN 4
-    WHEN apgs.mt IN (3, 4, 5, 6) THEN 5
-    ELSE NULL
-END;
-"""
-_MVR_KOSMETIKA = """
-UPDATE apgs SET kosmetika = CASE
-    WHEN apgs.mt IN (1, 7, 17) THEN 1
-    WHEN apgs.mt IN (8, 12, 14, 22) THEN 2
-    WHEN apgs.mt IN (2, 3, 4, 5, 10, 11, 15, 16, 23) THEN 3
-    WHEN apgs.mt IN (9, 18, 24, 25, 21, 19) THEN 4
-    WHEN apgs.mt = 6 THEN 5
-    ELSE NULL
-END;
-"""
-_MVR_MELLENES = """
-UPDATE apgs SET mellenes = (CASE
-    WHEN apgs.mt IN (8, 18, 23) THEN 0.28
-    WHEN apgs.mt = 3 THEN 0.24
-    WHEN apgs.mt = 2 THEN 0.20
-    WHEN apgs.mt IN (17, 9) THEN 0.16
-    WHEN apgs.mt = 4 THEN 0.13
-    WHEN apgs.mt IN (14, 22) THEN 0.11
-    WHEN apgs.mt IN (1, 24, 19) THEN 0.09
-    WHEN apgs.mt IN (7, 12) THEN 0.07
-    ELSE 0
-END * CASE
-    WHEN apgs.s10 IN (1, 22, 14, 28, 13) THEN 1.25
-    WHEN apgs.s10 IN (3, 15, 23) THEN 1.0
-    WHEN apgs.s10 IN (4, 8) THEN 0.5
-    ELSE 0
-END) * (CASE
-    WHEN apgs.a10 > 110 THEN 1.1
-    WHEN apgs.a10 > 0 AND apgs.a10 < 111 THEN apgs.a10 / 100.0
-    ELSE 0
-END) * (-0.0154 * apgs.biez * apgs.biez + 0.2269 * apgs.biez + 0.1061) * (CASE
-    WHEN apgs.mt = 1 THEN 205
-    WHEN apgs.mt = 2 THEN 485
-    WHEN apgs.mt = 3 THEN 408
-    WHEN apgs.mt = 4 THEN 408
-    WHEN apgs.mt = 5 THEN 408
-    WHEN apgs.mt = 6 THEN 0
-    WHEN apgs.mt = 7 THEN 377
-    WHEN apgs.mt = 8 THEN 1040
-    WHEN apgs.mt = 9 THEN 287
-    WHEN apgs.mt = 10 THEN 287
-    WHEN apgs.mt = 11 THEN 0
-    WHEN apgs.mt = 12 THEN 377
-    WHEN apgs.mt = 14 THEN 1040
-    WHEN apgs.mt = 15 THEN 287
-    WHEN apgs.mt = 16 THEN 0
-    WHEN apgs.mt = 17 THEN 377
-    WHEN apgs.mt = 18 THEN 782
-    WHEN apgs.mt = 19 THEN 287
-    WHEN apgs.mt = 21 THEN 0
-    WHEN apgs.mt = 22 THEN 377
-    WHEN apgs.mt = 23 THEN 782
-    WHEN apgs.mt = 24 THEN 287
-    WHEN apgs.mt = 25 THEN 0
-    ELSE 0
-END) * (0.04009 * pow(0.22456, apgs.biez) * pow(apgs.biez, 6.6579));
-"""
-_MVR_NOTURIBA = """
-UPDATE apgs SET noturiba = CASE
-    WHEN (apgs.mt IN (1, 12)) OR (apgs.zkat IN (21, 22, 23, 31, 32, 33, 34, 41)) THEN 1
-    WHEN apgs.mt IN (7, 14, 15, 22, 23) THEN 2
-    WHEN apgs.mt IN (8, 9, 16, 17, 18, 24, 25) THEN 3
-    WHEN apgs.mt IN (2, 3, 10, 11, 19, 21) THEN 4
-    WHEN (apgs.mt IN (4, 5, 6)) OR apgs.zkat = 544 THEN 5
-    ELSE NULL
-END + CASE
-    WHEN (apgs.s10 IN (4, 6, 8, 68, 12, 19, 20, 25, 26, 27, 32, 35, 50, 62, 67)) AND apgs.a10 < 11 OR (apgs.s10 IN (1, 3, 23, 10, 11, 13, 14, 65, 22, 15, 63, 64, 61, 17, 28, 66, 18, 24, 16)) AND apgs.a10 < 21 OR (apgs.s10 IN (9, 21)) AND apgs.a10 < 6 THEN -2
-    WHEN (apgs.s10 IN (4, 6, 8, 68, 12, 19, 20, 25, 26, 27, 32, 35, 50, 62, 67)) AND apgs.a10 > 10 AND apgs.a10 < 21 OR (apgs.s10 IN (1, 3, 23, 10, 11, 13, 14, 65, 22, 15, 63, 64, 61, 17, 28, 66, 18, 24, 16)) AND apgs.a10 > 20 AND apgs.a10 < 41 OR (apgs.s10 IN (9, 21)) AND apgs.a10 > 5 AND apgs.a10 < 11 THEN -1
-    WHEN (apgs.s10 IN (4, 6, 8, 68, 12, 19, 20, 25, 26, 27, 32, 35, 50, 62, 67)) AND apgs.a10 > 20 AND apgs.a10 < 41 OR (apgs.s10 IN (1, 3, 23, 10, 11, 13, 14, 65, 22, 15, 63, 64, 61, 17, 28, 66, 18, 24, 16)) AND apgs.a10 > 40 AND apgs.a10 < 81 OR (apgs.s10 IN (9, 21)) AND apgs.a10 > 10 AND apgs.a10 < 21 THEN 0
-    WHEN (apgs.s10 IN (4, 6, 8, 68, 12, 19, 20, 25, 26, 27, 32, 35, 50, 62, 67)) AND apgs.a10 > 40 AND apgs.a10 < 61 OR (apgs.s10 IN (1, 3, 23, 10, 11, 13, 14, 65, 22, 15, 63, 64, 61, 17, 28, 66, 18, 24, 16)) AND apgs.a10 > 80 AND apgs.a10 < 121 OR (apgs.s10 IN (9, 21)) AND apgs.a10 > 20 AND apgs.a10 < 31 THEN + 1
-    WHEN (apgs.s10 IN (4, 6, 8, 68, 12, 19, 20, 25, 26, 27, 32, 35, 50, 62, 67)) AND apgs.a10 > 60 OR (apgs.s10 IN (1, 3, 23, 10, 11, 13, 14, 65, 22, 15, 63, 64, 61, 17, 28, 66, 18, 24, 16)) AND apgs.a10 > 120 OR (apgs.s10 IN (9, 21)) AND apgs.a10 > 20 AND apgs.a10 < 31 THEN 0
-    ELSE 0
-END + CASE
-    WHEN apgs.s10 IN (1, 22, 14, 28, 13) THEN 0
-    WHEN apgs.s10 IN (3, 15, 23) THEN -1
-    WHEN apgs.s10 IN (4, 6, 8, 68, 12, 19, 20, 25, 26, 27, 32, 35, 50, 62, 67, 10, 11, 65, 63, 64, 61, 17, 66, 18, 24, 16, 9, 21) THEN 1
-    ELSE 0
-END;
-"""  # noqa: E501
-_MVR_PIEVILCIBA = """
-UPDATE apgs SET pievilciba = 4.80 + CASE
-    WHEN apgs.s10 IN (1, 22, 14, 13) THEN 0.15
-    WHEN apgs.s10 IN (3, 15, 23, 28) THEN -0.24
-    WHEN apgs.s10 IN (4, 8, 12, 63, 66, 24, 16, 10, 61) THEN 0
-    ELSE -0.20
-END + CASE
-    WHEN apgs.h10 >= 0.1 AND apgs.h10 <= 10 THEN 1.16
-    WHEN apgs.h10 > 10 AND apgs.h10 <= 20 THEN 1.66
-    WHEN apgs.h10 > 20 THEN 1.82
-    ELSE 0
-END + CASE
-    WHEN apgs.s10 <> 3 AND apgs.biez >= 8 AND apgs.k22 = 0 THEN 0.40
-    WHEN apgs.k22 > 0 OR (apgs.s10 IN (3, 15, 23, 28)) THEN 0.06
-    WHEN apgs.k22 = 0 AND apgs.s10 <> 3 AND apgs.biez < 8 AND apgs.biez >= 5 THEN 0.85
-    WHEN apgs.s10 <> 3 AND apgs.biez <= 4 AND apgs.biez >= 2 THEN 0.72
-    ELSE 0
-END;
-"""
-_MVR_REKREACIJA = """
-UPDATE apgs SET rekreacija = CASE
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (1, 22, 14, 28, 13)) AND apgs.a10 > 80 AND apgs.biez > 3 AND apgs.biez < 9 THEN 100
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (1, 22, 14, 28, 13)) AND apgs.a10 > 80 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 57
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (1, 22, 14, 28, 13)) AND apgs.a10 <= 80 AND apgs.a10 > 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 60
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (1, 22, 14, 28, 13)) AND apgs.a10 <= 80 AND apgs.a10 > 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 35
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (1, 22, 14, 28, 13)) AND apgs.a10 <= 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 20
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (1, 22, 14, 28, 13)) AND apgs.a10 <= 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 11
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (1, 22, 14, 28, 13)) AND apgs.a10 > 80 AND apgs.biez > 3 AND apgs.biez < 9 THEN 61
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (1, 22, 14, 28, 13)) AND apgs.a10 > 80 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 35
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (1, 22, 14, 28, 13)) AND apgs.a10 <= 80 AND apgs.a10 > 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 37
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (1, 22, 14, 28, 13)) AND apgs.a10 <= 80 AND apgs.a10 > 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 21
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (1, 22, 14, 28, 13)) AND apgs.a10 <= 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 12
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (1, 22, 14, 28, 13)) AND apgs.a10 <= 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 7
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (1, 22, 14, 28, 13)) AND apgs.a10 > 80 AND apgs.biez > 3 AND apgs.biez < 9 THEN 19
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (1, 22, 14, 28, 13)) AND apgs.a10 > 80 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 11
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (1, 22, 14, 28, 13)) AND apgs.a10 <= 80 AND apgs.a10 > 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 11
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (1, 22, 14, 28, 13)) AND apgs.a10 <= 80 AND apgs.a10 > 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 7
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (1, 22, 14, 28, 13)) AND apgs.a10 <= 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 4
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (1, 22, 14, 28, 13)) AND apgs.a10 <= 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 2
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (10, 61)) AND apgs.a10 > 80 AND apgs.biez > 3 AND apgs.biez < 9 THEN 80
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (10, 61)) AND apgs.a10 > 80 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 46
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (10, 61)) AND apgs.a10 <= 80 AND apgs.a10 > 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 48
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (10, 61)) AND apgs.a10 <= 80 AND apgs.a10 > 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 28
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (10, 61)) AND apgs.a10 <= 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 16
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (10, 61)) AND apgs.a10 <= 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 9
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (10, 61)) AND apgs.a10 > 80 AND apgs.biez > 3 AND apgs.biez < 9 THEN 48
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (10, 61)) AND apgs.a10 > 80 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 28
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (10, 61)) AND apgs.a10 <= 80 AND apgs.a10 > 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 29
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (10, 61)) AND apgs.a10 <= 80 AND apgs.a10 > 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 17
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (10, 61)) AND apgs.a10 <= 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 10
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (10, 61)) AND apgs.a10 <= 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 5
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (10, 61)) AND apgs.a10 > 80 AND apgs.biez > 3 AND apgs.biez < 9 THEN 16
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (10, 61)) AND apgs.a10 > 80 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 9
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (10, 61)) AND apgs.a10 <= 80 AND apgs.a10 > 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 10
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (10, 61)) AND apgs.a10 <= 80 AND apgs.a10 > 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 6
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (10, 61)) AND apgs.a10 <= 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 3
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (10, 61)) AND apgs.a10 <= 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 2
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND apgs.s10 = 4 AND apgs.a10 > 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 70
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND apgs.s10 = 4 AND apgs.a10 > 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 40
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND apgs.s10 = 4 AND apgs.a10 <= 40 AND apgs.a10 > 20 AND apgs.biez > 3 AND apgs.biez < 9 THEN 42
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND apgs.s10 = 4 AND apgs.a10 <= 40 AND apgs.a10 > 20 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 24
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND apgs.s10 = 4 AND apgs.a10 <= 20 AND apgs.biez > 3 AND apgs.biez < 9 THEN 14
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND apgs.s10 = 4 AND apgs.a10 <= 20 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 8
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND apgs.s10 = 4 AND apgs.a10 > 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 42
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND apgs.s10 = 4 AND apgs.a10 > 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 24
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND apgs.s10 = 4 AND apgs.a10 <= 40 AND apgs.a10 > 20 AND apgs.biez > 3 AND apgs.biez < 9 THEN 25
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND apgs.s10 = 4 AND apgs.a10 <= 40 AND apgs.a10 > 20 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 14
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND apgs.s10 = 4 AND apgs.a10 <= 20 AND apgs.biez > 3 AND apgs.biez < 9 THEN 8
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND apgs.s10 = 4 AND apgs.a10 <= 20 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 5
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND apgs.s10 = 4 AND apgs.a10 > 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 14
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND apgs.s10 = 4 AND apgs.a10 > 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 8
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND apgs.s10 = 4 AND apgs.a10 <= 40 AND apgs.a10 > 20 AND apgs.biez > 3 AND apgs.biez < 9 THEN 8
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND apgs.s10 = 4 AND apgs.a10 <= 40 AND apgs.a10 > 20 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 5
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND apgs.s10 = 4 AND apgs.a10 <= 20 AND apgs.biez > 3 AND apgs.biez < 9 THEN 3
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND apgs.s10 = 4 AND apgs.a10 <= 20 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 1
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (3, 15, 23)) AND apgs.a10 > 60 AND apgs.biez > 3 AND apgs.biez < 9 THEN 50
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (3, 15, 23)) AND apgs.a10 > 60 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 28
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (3, 15, 23)) AND apgs.a10 <= 60 AND apgs.a10 > 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 30
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (3, 15, 23)) AND apgs.a10 <= 60 AND apgs.a10 > 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 17
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (3, 15, 23)) AND apgs.a10 <= 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 10
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (3, 15, 23)) AND apgs.a10 <= 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 5
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (3, 15, 23)) AND apgs.a10 > 60 AND apgs.biez > 3 AND apgs.biez < 9 THEN 30
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (3, 15, 23)) AND apgs.a10 > 60 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 17
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (3, 15, 23)) AND apgs.a10 <= 60 AND apgs.a10 > 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 18
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (3, 15, 23)) AND apgs.a10 <= 60 AND apgs.a10 > 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 10
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (3, 15, 23)) AND apgs.a10 <= 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 6
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (3, 15, 23)) AND apgs.a10 <= 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 3
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (3, 15, 23)) AND apgs.a10 > 60 AND apgs.biez > 3 AND apgs.biez < 9 THEN 10
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (3, 15, 23)) AND apgs.a10 > 60 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 5
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (3, 15, 23)) AND apgs.a10 <= 60 AND apgs.a10 > 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 5
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (3, 15, 23)) AND apgs.a10 <= 60 AND apgs.a10 > 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 3
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (3, 15, 23)) AND apgs.a10 <= 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 2
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (3, 15, 23)) AND apgs.a10 <= 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 1
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (11, 64, 12, 25, 26, 27, 35, 50, 62, 67, 65, 63, 17, 66, 18, 24, 16)) AND apgs.a10 > 60 AND apgs.biez > 3 AND apgs.biez < 9 THEN 50
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (11, 64, 12, 25, 26, 27, 35, 50, 62, 67, 65, 63, 17, 66, 18, 24, 16)) AND apgs.a10 > 60 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 28
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (11, 64, 12, 25, 26, 27, 35, 50, 62, 67, 65, 63, 17, 66, 18, 24, 16)) AND apgs.a10 <= 60 AND apgs.a10 > 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 30
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (11, 64, 12, 25, 26, 27, 35, 50, 62, 67, 65, 63, 17, 66, 18, 24, 16)) AND apgs.a10 <= 60 AND apgs.a10 > 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 17
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (11, 64, 12, 25, 26, 27, 35, 50, 62, 67, 65, 63, 17, 66, 18, 24, 16)) AND apgs.a10 <= 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 10
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (11, 64, 12, 25, 26, 27, 35, 50, 62, 67, 65, 63, 17, 66, 18, 24, 16)) AND apgs.a10 <= 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 5
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (11, 64, 12, 25, 26, 27, 35, 50, 62, 67, 65, 63, 17, 66, 18, 24, 16)) AND apgs.a10 > 60 AND apgs.biez > 3 AND apgs.biez < 9 THEN 30
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (11, 64, 12, 25, 26, 27, 35, 50, 62, 67, 65, 63, 17, 66, 18, 24, 16)) AND apgs.a10 > 60 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 17
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (11, 64, 12, 25, 26, 27, 35, 50, 62, 67, 65, 63, 17, 66, 18, 24, 16)) AND apgs.a10 <= 60 AND apgs.a10 > 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 18
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (11, 64, 12, 25, 26, 27, 35, 50, 62, 67, 65, 63, 17, 66, 18, 24, 16)) AND apgs.a10 <= 60 AND apgs.a10 > 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 10
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (11, 64, 12, 25, 26, 27, 35, 50, 62, 67, 65, 63, 17, 66, 18, 24, 16)) AND apgs.a10 <= 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 6
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (11, 64, 12, 25, 26, 27, 35, 50, 62, 67, 65, 63, 17, 66, 18, 24, 16)) AND apgs.a10 <= 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 3
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (11, 64, 12, 25, 26, 27, 35, 50, 62, 67, 65, 63, 17, 66, 18, 24, 16)) AND apgs.a10 > 60 AND apgs.biez > 3 AND apgs.biez < 9 THEN 10
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (11, 64, 12, 25, 26, 27, 35, 50, 62, 67, 65, 63, 17, 66, 18, 24, 16)) AND apgs.a10 > 60 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 5
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (11, 64, 12, 25, 26, 27, 35, 50, 62, 67, 65, 63, 17, 66, 18, 24, 16)) AND apgs.a10 <= 60 AND apgs.a10 > 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 5
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (11, 64, 12, 25, 26, 27, 35, 50, 62, 67, 65, 63, 17, 66, 18, 24, 16)) AND apgs.a10 <= 60 AND apgs.a10 > 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 3
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (11, 64, 12, 25, 26, 27, 35, 50, 62, 67, 65, 63, 17, 66, 18, 24, 16)) AND apgs.a10 <= 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 2
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (11, 64, 12, 25, 26, 27, 35, 50, 62, 67, 65, 63, 17, 66, 18, 24, 16)) AND apgs.a10 <= 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 1
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (8, 68, 19, 20)) AND apgs.a10 > 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 40
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (8, 68, 19, 20)) AND apgs.a10 > 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 23
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (8, 68, 19, 20)) AND apgs.a10 <= 40 AND apgs.a10 > 20 AND apgs.biez > 3 AND apgs.biez < 9 THEN 24
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (8, 68, 19, 20)) AND apgs.a10 <= 40 AND apgs.a10 > 20 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 14
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (8, 68, 19, 20)) AND apgs.a10 <= 20 AND apgs.biez > 3 AND apgs.biez < 9 THEN 8
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (8, 68, 19, 20)) AND apgs.a10 <= 20 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 4
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (8, 68, 19, 20)) AND apgs.a10 > 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 24
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (8, 68, 19, 20)) AND apgs.a10 > 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 14
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (8, 68, 19, 20)) AND apgs.a10 <= 40 AND apgs.a10 > 20 AND apgs.biez > 3 AND apgs.biez < 9 THEN 15
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (8, 68, 19, 20)) AND apgs.a10 <= 40 AND apgs.a10 > 20 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 8
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (8, 68, 19, 20)) AND apgs.a10 <= 20 AND apgs.biez > 3 AND apgs.biez < 9 THEN 5
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (8, 68, 19, 20)) AND apgs.a10 <= 20 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 3
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (8, 68, 19, 20)) AND apgs.a10 > 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 8
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (8, 68, 19, 20)) AND apgs.a10 > 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 4
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (8, 68, 19, 20)) AND apgs.a10 <= 40 AND apgs.a10 > 20 AND apgs.biez > 3 AND apgs.biez < 9 THEN 4
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (8, 68, 19, 20)) AND apgs.a10 <= 40 AND apgs.a10 > 20 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 3
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (8, 68, 19, 20)) AND apgs.a10 <= 20 AND apgs.biez > 3 AND apgs.biez < 9 THEN 2
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (8, 68, 19, 20)) AND apgs.a10 <= 20 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 1
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND apgs.s10 = 6 AND apgs.a10 > 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 30
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND apgs.s10 = 6 AND apgs.a10 > 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 17
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND apgs.s10 = 6 AND apgs.a10 <= 40 AND apgs.a10 > 20 AND apgs.biez > 3 AND apgs.biez < 9 THEN 18
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND apgs.s10 = 6 AND apgs.a10 <= 40 AND apgs.a10 > 20 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 10
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND apgs.s10 = 6 AND apgs.a10 <= 20 AND apgs.biez > 3 AND apgs.biez < 9 THEN 6
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND apgs.s10 = 6 AND apgs.a10 <= 20 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 3
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND apgs.s10 = 6 AND apgs.a10 > 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 21
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND apgs.s10 = 6 AND apgs.a10 > 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 12
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND apgs.s10 = 6 AND apgs.a10 <= 40 AND apgs.a10 > 20 AND apgs.biez > 3 AND apgs.biez < 9 THEN 13
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND apgs.s10 = 6 AND apgs.a10 <= 40 AND apgs.a10 > 20 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 7
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND apgs.s10 = 6 AND apgs.a10 <= 20 AND apgs.biez > 3 AND apgs.biez < 9 THEN 4
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND apgs.s10 = 6 AND apgs.a10 <= 20 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 2
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND apgs.s10 = 6 AND apgs.a10 > 40 AND apgs.biez > 3 AND apgs.biez < 9 THEN 6
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND apgs.s10 = 6 AND apgs.a10 > 40 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 3
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND apgs.s10 = 6 AND apgs.a10 <= 40 AND apgs.a10 > 20 AND apgs.biez > 3 AND apgs.biez < 9 THEN 4
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND apgs.s10 = 6 AND apgs.a10 <= 40 AND apgs.a10 > 20 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 2
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND apgs.s10 = 6 AND apgs.a10 <= 20 AND apgs.biez > 3 AND apgs.biez < 9 THEN 1
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND apgs.s10 = 6 AND apgs.a10 <= 20 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 1
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (9, 21, 32)) AND apgs.a10 > 20 AND apgs.biez > 3 AND apgs.biez < 9 THEN 20
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (9, 21, 32)) AND apgs.a10 > 20 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 11
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (9, 21, 32)) AND apgs.a10 <= 20 AND apgs.a10 > 10 AND apgs.biez > 3 AND apgs.biez < 9 THEN 12
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (9, 21, 32)) AND apgs.a10 <= 20 AND apgs.a10 > 10 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 7
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (9, 21, 32)) AND apgs.a10 <= 10 AND apgs.biez > 3 AND apgs.biez < 9 THEN 4
-    WHEN (apgs.mt IN (1, 2, 3, 4, 5, 6)) AND (apgs.s10 IN (9, 21, 32)) AND apgs.a10 <= 10 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 2
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (9, 21, 32)) AND apgs.a10 > 20 AND apgs.biez > 3 AND apgs.biez < 9 THEN 14
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (9, 21, 32)) AND apgs.a10 > 20 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 8
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (9, 21, 32)) AND apgs.a10 <= 20 AND apgs.a10 > 10 AND apgs.biez > 3 AND apgs.biez < 9 THEN 8
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (9, 21, 32)) AND apgs.a10 <= 20 AND apgs.a10 > 10 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 5
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (9, 21, 32)) AND apgs.a10 <= 10 AND apgs.biez > 3 AND apgs.biez < 9 THEN 3
-    WHEN (apgs.mt IN (17, 18, 19, 21, 22, 23, 24, 25)) AND (apgs.s10 IN (9, 21, 32)) AND apgs.a10 <= 10 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 1
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (9, 21, 32)) AND apgs.a10 > 20 AND apgs.biez > 3 AND apgs.biez < 9 THEN 4
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (9, 21, 32)) AND apgs.a10 > 20 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 2
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (9, 21, 32)) AND apgs.a10 <= 20 AND apgs.a10 > 10 AND apgs.biez > 3 AND apgs.biez < 9 THEN 2
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (9, 21, 32)) AND apgs.a10 <= 20 AND apgs.a10 > 10 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 1
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (9, 21, 32)) AND apgs.a10 <= 10 AND apgs.biez > 3 AND apgs.biez < 9 THEN 1
-    WHEN (apgs.mt IN (7, 8, 9, 10, 11, 12, 14, 15, 16)) AND (apgs.s10 IN (9, 21, 32)) AND apgs.a10 <= 10 AND (apgs.biez <= 3 OR apgs.biez >= 9) THEN 0
-    WHEN apgs.zkat = 14 THEN 0
-    ELSE NULL
-END;
-"""
-_MVR_TROKSNIS = """
-UPDATE apgs SET troksnis = CASE
-    WHEN (apgs.s10 IN (1, 22, 14, 28, 13, 3, 15, 23)) AND apgs.biez < 2 THEN 1
-    WHEN (apgs.s10 IN (1, 22, 14, 28, 13, 3, 15, 23)) AND apgs.biez >= 2 AND apgs.biez < 4 THEN 2
-    WHEN (apgs.s10 IN (1, 22, 14, 28, 13, 3, 15, 23)) AND apgs.biez >= 4 AND apgs.biez < 6 THEN 3
-    WHEN (apgs.s10 IN (1, 22, 14, 28, 13, 3, 15, 23)) AND apgs.biez >= 6 AND apgs.biez < 8 THEN 4
-    WHEN (apgs.s10 IN (1, 22, 14, 28, 13, 3, 15, 23)) AND apgs.biez >= 8 THEN 5
-    WHEN (apgs.s10 IN (4, 6, 8, 68, 12, 19, 20, 25, 26, 27, 32, 35, 50, 62, 67, 10, 11, 65, 63, 64, 61, 17, 66, 18, 24, 16, 9, 21)) AND apgs.biez < 3 THEN 1
-    WHEN (apgs.s10 IN (4, 6, 8, 68, 12, 19, 20, 25, 26, 27, 32, 35, 50, 62, 67, 10, 11, 65, 63, 64, 61, 17, 66, 18, 24, 16, 9, 21)) AND apgs.biez >= 3 AND apgs.biez < 5 THEN 2
-    WHEN (apgs.s10 IN (4, 6, 8, 68, 12, 19, 20, 25, 26, 27, 32, 35, 50, 62, 67, 10, 11, 65, 63, 64, 61, 17, 66, 18, 24, 16, 9, 21)) AND apgs.biez >= 5 AND apgs.biez < 7 THEN 3
-    WHEN (apgs.s10 IN (4, 6, 8, 68, 12, 19, 20, 25, 26, 27, 32, 35, 50, 62, 67, 10, 11, 65, 63, 64, 61, 17, 66, 18, 24, 16, 9, 21)) AND apgs.biez >= 7 AND apgs.biez < 9 THEN 4
-    WHEN (apgs.s10 IN (4, 6, 8, 68, 12, 19, 20, 25, 26, 27, 32, 35, 50, 62, 67, 10, 11, 65, 63, 64, 61, 17, 66, 18, 24, 16, 9, 21)) AND apgs.biez >= 9 THEN 5
-    ELSE 0
-END;
-"""
-_MVR_UGUNSBISTAMIBA = """
-UPDATE apgs SET ugunsbistamiba = CASE
-    WHEN (apgs.mt IN (1, 2, 3, 4, 7, 17, 18, 19, 22, 23, 24)) AND (apgs.s10 IN (1, 3, 13, 14, 15, 22, 23, 28, 29)) OR (apgs.mt IN (5)) AND (apgs.s10 IN (1, 3, 13, 14, 15, 22, 23, 28, 29)) AND apgs.a10 < 40 THEN 1
-    WHEN (apgs.mt IN (5)) AND (apgs.s10 IN (1, 3, 13, 14, 15, 22, 23, 28, 29)) AND apgs.a10 > 39 OR (apgs.mt IN (4, 5, 6, 19, 22, 23, 24)) AND (apgs.s10 IN (4, 6, 8, 9, 10, 11, 12, 16, 17, 18, 19, 20, 21, 24, 25, 26, 27, 32, 25, 50, 61, 62, 63, 64, 65, 66, 67, 68)) OR (apgs.mt IN (8, 9, 10, 11, 21, 25)) THEN 2
-    WHEN apgs.mt IN (12, 14, 15, 16) THEN 3
-    ELSE 0
-END;
-"""  # noqa: E501
+# suitability classes per meza tips (mt), translated from the former per-column SQL CASE maps:
+# a dense lookup table indexed by mt replaces the linear WHEN walk with a single numpy gather over all apgs at once
+# (the IN-list membership tests of the SQL version are gone with it, so there is nothing left to hoist into carray
+# bindings or temp join tables)
+_MT_LUT_SIZE = 64
+_ARSTNIECIBA_MT = (((7, 8, 12, 17, 18, 22), 1), ((1, 9, 14, 23), 2), ((2, 10, 15, 19, 24), 3), ((3, 11, 16, 21), 4), ((4, 5, 6, 25), 5))
+_FITOREMEDIACIJA_MT = (((11, 16, 25), 1), ((7, 10, 15, 21), 2), ((1, 5, 6, 8, 12, 17, 19, 23), 3), ((2, 3, 4, 9, 14, 22), 4), ((18, 24), 5))
+_FLORISTIKA_MT = (((7, 8, 12, 14, 17, 18, 22, 23), 1), ((9, 10, 15, 24), 2), ((1, 2, 11, 16, 19, 25), 3), ((21,), 4), ((3, 4, 5, 6), 5))
+_KOSMETIKA_MT = (((1, 7, 17), 1), ((8, 12, 14, 22), 2), ((2, 3, 4, 5, 10, 11, 15, 16, 23), 3), ((9, 18, 24, 25, 21, 19), 4), ((6,), 5))
+
+# berry yield model terms per mt and valdosa suga (s10), from the former bruklenes/mellenes SQL expressions
+_S10_LUT_SIZE = 256
+_BRUKLENES_MT = (((1, 7, 17), 0.22), ((2,), 0.18), ((8,), 0.15), ((3, 18, 22, 23), 0.13), ((14, 12, 9), 0.07))
+_BRUKLENES_FACTOR_MT = (((1,), 203), ((2,), 488), ((3,), 378), ((4, 5), 189), ((7,), 265), ((8,), 642), ((9,), 287), ((17, 22), 275), ((23,), 558))
+_MELLENES_MT = (((8, 18, 23), 0.28), ((3,), 0.24), ((2,), 0.20), ((17, 9), 0.16), ((4,), 0.13), ((14, 22), 0.11), ((1, 24, 19), 0.09), ((7, 12), 0.07))
+_MELLENES_FACTOR_MT = (((1,), 205), ((2,), 485), ((3, 4, 5), 408), ((7, 12, 17, 22), 377), ((8, 14), 1040), ((9, 10, 15, 19, 24), 287), ((18, 23), 782))
+# both berry scores use the same species multiplier
+_BERRIES_S10 = (((1, 22, 14, 28, 13), 1.25), ((3, 15, 23), 1.0), ((4, 8), 0.5))
+
+# pievilciba: 4.80 base plus s10, height and undergrowth terms
+_PIEVILCIBA_S10 = (((1, 22, 14, 13), 0.15), ((3, 15, 23, 28), -0.24), ((4, 8, 12, 63, 66, 24, 16, 10, 61), 0))
+
+# troksnis: biez bands shifted by one between the skuju/lapu koku s10 classes
+_TROKSNIS_CLASSES = (
+    ((1, 22, 14, 28, 13, 3, 15, 23), (2, 4, 6, 8)),
+    ((4, 6, 8, 68, 12, 19, 20, 25, 26, 27, 32, 35, 50, 62, 67, 10, 11, 65, 63, 64, 61, 17, 66, 18, 24, 16, 9, 21), (3, 5, 7, 9)),
+)
+
+# ugunsbistamiba arms on mt group x s10 class, with an a10 split only for mt 5 stands
+_UGUNSBISTAMIBA_MT_1 = (1, 2, 3, 4, 7, 17, 18, 19, 22, 23, 24)
+_UGUNSBISTAMIBA_MT_2 = (4, 5, 6, 19, 22, 23, 24)
+_UGUNSBISTAMIBA_MT_2B = (8, 9, 10, 11, 21, 25)
+_UGUNSBISTAMIBA_MT_3 = (12, 14, 15, 16)
+_UGUNSBISTAMIBA_S10_SKUJU = (1, 3, 13, 14, 15, 22, 23, 28, 29)
+_UGUNSBISTAMIBA_S10_LAPU = (4, 6, 8, 9, 10, 11, 12, 16, 17, 18, 19, 20, 21, 24, 25, 26, 27, 32, 50, 61, 62, 63, 64, 65, 66, 67, 68)
+
+# noturiba: mt/zkat base class, an age band modifier with per-s10-class band edges, and an s10 modifier
+_NOTURIBA_MT = (((1, 12), 1), ((7, 14, 15, 22, 23), 2), ((8, 9, 16, 17, 18, 24, 25), 3), ((2, 3, 10, 11, 19, 21), 4), ((4, 5, 6), 5))
+_NOTURIBA_ZKAT_FIRST = (21, 22, 23, 31, 32, 33, 34, 41)
+_NOTURIBA_AGE_CLASSES = (
+    ((4, 6, 8, 68, 12, 19, 20, 25, 26, 27, 32, 35, 50, 62, 67), (11, 21, 41, 61)),
+    ((1, 3, 23, 10, 11, 13, 14, 65, 22, 15, 63, 64, 61, 17, 28, 66, 18, 24, 16), (21, 41, 81, 121)),
+    ((9, 21), (6, 11, 21, 31)),
+)
+_NOTURIBA_AGE_DELTAS = (-2, -1, 0, 1, 0)
+_NOTURIBA_S10 = (((3, 15, 23), -1), ((4, 6, 8, 68, 12, 19, 20, 25, 26, 27, 32, 35, 50, 62, 67, 10, 11, 65, 63, 64, 61, 17, 66, 18, 24, 16, 9, 21), 1))
+
+# the rekreacija CASE enumerated every mt series group x s10 group x age band x biezums bin combination as its own WHEN arm;
+# the same table as a dense tensor, age band edges per s10 group, bin 1 holds biez in the open (3, 9) interval
+_REKREACIJA_MT_GROUPS = ((1, 2, 3, 4, 5, 6), (17, 18, 19, 21, 22, 23, 24, 25), (7, 8, 9, 10, 11, 12, 14, 15, 16))
+_REKREACIJA_S10_GROUPS = (
+    ((1, 22, 14, 28, 13), 80, 40, (((11, 20), (35, 60), (57, 100)), ((7, 12), (21, 37), (35, 61)), ((2, 4), (7, 11), (11, 19)))),
+    ((10, 61), 80, 40, (((9, 16), (28, 48), (46, 80)), ((5, 10), (17, 29), (28, 48)), ((2, 3), (6, 10), (9, 16)))),
+    ((4,), 40, 20, (((8, 14), (24, 42), (40, 70)), ((5, 8), (14, 25), (24, 42)), ((1, 3), (5, 8), (8, 14)))),
+    ((3, 15, 23), 60, 40, (((5, 10), (17, 30), (28, 50)), ((3, 6), (10, 18), (17, 30)), ((1, 2), (3, 5), (5, 10)))),
+    ((11, 64, 12, 25, 26, 27, 35, 50, 62, 67, 65, 63, 17, 66, 18, 24, 16), 60, 40, (((5, 10), (17, 30), (28, 50)), ((3, 6), (10, 18), (17, 30)), ((1, 2), (3, 5), (5, 10)))),
+    ((8, 68, 19, 20), 40, 20, (((4, 8), (14, 24), (23, 40)), ((3, 5), (8, 15), (14, 24)), ((1, 2), (3, 4), (4, 8)))),
+    ((6,), 40, 20, (((3, 6), (10, 18), (17, 30)), ((2, 4), (7, 13), (12, 21)), ((1, 1), (2, 4), (3, 6)))),
+    ((9, 21, 32), 20, 10, (((2, 4), (7, 12), (11, 20)), ((1, 3), (5, 8), (8, 14)), ((0, 1), (1, 2), (2, 4)))),
+)
+
+
+def _make_lut(groups: tuple[tuple[tuple[int, ...], float], ...], default: float = math.nan, size: int = _MT_LUT_SIZE) -> np.ndarray[tuple[int], np.dtype[np.float64]]:
+    lut = np.full(size, default)
+    for codes, value in groups:
+        lut[list(codes)] = value
+    return lut
+
+
+def _lut_codes(values: "pd.Series[Any]", size: int) -> np.ndarray[tuple[int], np.dtype[np.int64]]:
+    # NULL and out-of-range codes index slot 0, which always holds the ELSE value of the original CASE
+    codes = pd.to_numeric(values, errors="coerce").to_numpy(np.float64)
+    return np.where((codes >= 1) & (codes < size), codes, 0).astype(np.int64)
+
+
+def _make_classes(classes: tuple[tuple[tuple[int, ...], tuple[int, ...]], ...], default_edge: float) -> tuple[np.ndarray[tuple[int], np.dtype[np.int64]], np.ndarray[tuple[int, int], np.dtype[np.float64]]]:
+    class_lut = np.zeros(_S10_LUT_SIZE, np.int64)
+    edges = np.full((len(classes) + 1, len(classes[0][1])), default_edge)
+    for index, (codes, class_edges) in enumerate(classes, 1):
+        class_lut[list(codes)] = index
+        edges[index] = class_edges
+    return class_lut, edges
+
+
+def _make_rekreacija_luts() -> tuple[
+    np.ndarray[tuple[int], np.dtype[np.int64]],
+    np.ndarray[tuple[int], np.dtype[np.int64]],
+    np.ndarray[tuple[int], np.dtype[np.float64]],
+    np.ndarray[tuple[int], np.dtype[np.float64]],
+    np.ndarray[tuple[int, int, int, int], np.dtype[np.float64]],
+]:
+    mt_group_lut = np.zeros(_MT_LUT_SIZE, np.int64)
+    for group, codes in enumerate(_REKREACIJA_MT_GROUPS, 1):
+        mt_group_lut[list(codes)] = group
+    s10_group_lut = np.zeros(_S10_LUT_SIZE, np.int64)
+    his = np.zeros(len(_REKREACIJA_S10_GROUPS) + 1)
+    los = np.zeros(len(_REKREACIJA_S10_GROUPS) + 1)
+    lut = np.full((len(_REKREACIJA_MT_GROUPS) + 1, len(_REKREACIJA_S10_GROUPS) + 1, 3, 2), math.nan)
+    for group, (codes, hi, lo, values) in enumerate(_REKREACIJA_S10_GROUPS, 1):
+        s10_group_lut[list(codes)] = group
+        his[group] = hi
+        los[group] = lo
+        lut[1:, group] = values
+    return mt_group_lut, s10_group_lut, his, los, lut
+
+
+# every derived lookup table is materialized once at import instead of per download_mvr call
+_ARSTNIECIBA_LUT = _make_lut(_ARSTNIECIBA_MT)
+_FITOREMEDIACIJA_LUT = _make_lut(_FITOREMEDIACIJA_MT)
+_FLORISTIKA_LUT = _make_lut(_FLORISTIKA_MT)
+_KOSMETIKA_LUT = _make_lut(_KOSMETIKA_MT)
+_BRUKLENES_MT_LUT = _make_lut(_BRUKLENES_MT, 0, _MT_LUT_SIZE)
+_BRUKLENES_FACTOR_LUT = _make_lut(_BRUKLENES_FACTOR_MT, 0, _MT_LUT_SIZE)
+_MELLENES_MT_LUT = _make_lut(_MELLENES_MT, 0, _MT_LUT_SIZE)
+_MELLENES_FACTOR_LUT = _make_lut(_MELLENES_FACTOR_MT, 0, _MT_LUT_SIZE)
+_BERRIES_S10_LUT = _make_lut(_BERRIES_S10, 0, _S10_LUT_SIZE)
+_PIEVILCIBA_S10_LUT = _make_lut(_PIEVILCIBA_S10, -0.20, _S10_LUT_SIZE)
+# class 0 (no s10 class) gets -inf noturiba edges so it lands in the last band, which carries delta 0
+_NOTURIBA_MT_LUT = _make_lut(_NOTURIBA_MT)
+_NOTURIBA_S10_LUT = _make_lut(_NOTURIBA_S10, 0, _S10_LUT_SIZE)
+_NOTURIBA_CLASS_LUT, _NOTURIBA_EDGES = _make_classes(_NOTURIBA_AGE_CLASSES, -math.inf)
+_NOTURIBA_DELTAS = np.asarray(_NOTURIBA_AGE_DELTAS, np.float64)
+_TROKSNIS_CLASS_LUT, _TROKSNIS_EDGES = _make_classes(_TROKSNIS_CLASSES, math.inf)
+_REKREACIJA_MT_GROUP_LUT, _REKREACIJA_S10_GROUP_LUT, _REKREACIJA_HIS, _REKREACIJA_LOS, _REKREACIJA_LUT = _make_rekreacija_luts()
+
+
+_MELLENES_LN_BASE = math.log(0.22456)
+
+
+def _berries_calc(
+    mt: np.ndarray[tuple[int], np.dtype[np.int64]],
+    s10: np.ndarray[tuple[int], np.dtype[np.int64]],
+    a10: np.ndarray[tuple[int], np.dtype[np.float64]],
+    biez: np.ndarray[tuple[int], np.dtype[np.float64]],
+) -> tuple[np.ndarray[tuple[int], np.dtype[np.float64]], np.ndarray[tuple[int], np.dtype[np.float64]]]:
+    bruklenes = np.empty(mt.shape, np.float64)
+    mellenes = np.empty(mt.shape, np.float64)
+    _berries_calc_kernel(mt, s10, a10, biez, _BRUKLENES_MT_LUT, _BRUKLENES_FACTOR_LUT, _MELLENES_MT_LUT, _MELLENES_FACTOR_LUT, _BERRIES_S10_LUT, bruklenes, mellenes)
+    return bruklenes, mellenes
+
+
+# no fastmath here: NULL measures are carried as NaN and must propagate through the products like SQL NULL did
+@numba.njit(parallel=True, boundscheck=False, cache=True)
+def _berries_calc_kernel(
+    mt: np.ndarray[tuple[int], np.dtype[np.int64]],
+    s10: np.ndarray[tuple[int], np.dtype[np.int64]],
+    a10: np.ndarray[tuple[int], np.dtype[np.float64]],
+    biez: np.ndarray[tuple[int], np.dtype[np.float64]],
+    bruklenes_coef_lut: np.ndarray[tuple[int], np.dtype[np.float64]],
+    bruklenes_factor_lut: np.ndarray[tuple[int], np.dtype[np.float64]],
+    mellenes_coef_lut: np.ndarray[tuple[int], np.dtype[np.float64]],
+    mellenes_factor_lut: np.ndarray[tuple[int], np.dtype[np.float64]],
+    mul_lut: np.ndarray[tuple[int], np.dtype[np.float64]],
+    bruklenes: np.ndarray[tuple[int], np.dtype[np.float64]],
+    mellenes: np.ndarray[tuple[int], np.dtype[np.float64]],
+) -> None:
+    # one pass over the rows for both berry scores: the species multiplier and the
+    # density polynomial are identical between them, only the mt terms and the last factor differ
+    for i in numba.prange(mt.shape[0]):  # pyright: ignore [reportPrivateImportUsage]
+        a = a10[i]
+        b = biez[i]
+        mul = mul_lut[s10[i]]
+        bpoly = -0.0154 * b * b + 0.2269 * b + 0.1061
+        measured = a == a and b == b
+        # rows whose mt/s10 codes score 0 skip the transcendentals entirely, unless a NaN measure
+        # still has to poison the product like SQL NULL would
+        coef = bruklenes_coef_lut[mt[i]] * mul * bruklenes_factor_lut[mt[i]]
+        if coef == 0 and measured:
+            bruklenes[i] = 0.0
+        else:
+            bruklenes[i] = (
+                coef
+                * (-0.00007 * a * a + 0.0132 * a + 0.3957)
+                * bpoly
+                * (1.0 / (1.0 + math.exp(-3.5722 + 0.648 * b)))
+            )
+        coef = mellenes_coef_lut[mt[i]] * mul * mellenes_factor_lut[mt[i]]
+        if coef == 0 and measured:
+            mellenes[i] = 0.0
+            continue
+        if a > 110:  # noqa: PLR2004
+            aterm = 1.1
+        elif a > 0 and a < 111:  # noqa: PLR2004
+            aterm = a / 100.0
+        else:
+            aterm = 0.0
+        # 0.04009 * 0.22456**b * b**6.6579 fused into one exp, b == 0 and NaN keep their pow results
+        if b > 0:
+            bterm = 0.04009 * math.exp(b * _MELLENES_LN_BASE + 6.6579 * math.log(b))
+        elif b == 0:
+            bterm = 0.0
+        else:
+            bterm = math.nan
+        mellenes[i] = coef * aterm * bpoly * bterm
+
+
+def _troksnis_calc(
+    s10: np.ndarray[tuple[int], np.dtype[np.int64]],
+    biez: np.ndarray[tuple[int], np.dtype[np.float64]],
+) -> np.ndarray[tuple[int], np.dtype[np.float64]]:
+    classes = _TROKSNIS_CLASS_LUT[s10]
+    out = (biez[:, np.newaxis] >= _TROKSNIS_EDGES[classes]).sum(axis=1) + 1.0
+    # no s10 class or a missing biez matched no arm
+    out[(classes == 0) | np.isnan(biez)] = 0
+    return out
+
+
+def _ugunsbistamiba_calc(
+    mt: np.ndarray[tuple[int], np.dtype[np.int64]],
+    s10: np.ndarray[tuple[int], np.dtype[np.int64]],
+    a10: np.ndarray[tuple[int], np.dtype[np.float64]],
+) -> np.ndarray[tuple[int], np.dtype[np.float64]]:
+    skuju = np.isin(s10, _UGUNSBISTAMIBA_S10_SKUJU)
+    return np.select(
+        (
+            (np.isin(mt, _UGUNSBISTAMIBA_MT_1) & skuju) | ((mt == 5) & skuju & (a10 < 40)),  # noqa: PLR2004
+            ((mt == 5) & skuju & (a10 > 39)) | (np.isin(mt, _UGUNSBISTAMIBA_MT_2) & np.isin(s10, _UGUNSBISTAMIBA_S10_LAPU)) | np.isin(mt, _UGUNSBISTAMIBA_MT_2B),  # noqa: PLR2004
+            np.isin(mt, _UGUNSBISTAMIBA_MT_3),
+        ),
+        (1.0, 2.0, 3.0),
+        0.0,
+    )
+
+
+def _pievilciba_calc(
+    s10: np.ndarray[tuple[int], np.dtype[np.int64]],
+    h10: np.ndarray[tuple[int], np.dtype[np.float64]],
+    biez: np.ndarray[tuple[int], np.dtype[np.float64]],
+    k22: np.ndarray[tuple[int], np.dtype[np.float64]],
+) -> np.ndarray[tuple[int], np.dtype[np.float64]]:
+    height = np.select(((h10 >= 0.1) & (h10 <= 10), (h10 > 10) & (h10 <= 20), h10 > 20), (1.16, 1.66, 1.82), 0.0)  # noqa: PLR2004
+    # s10 code 0 stands for NULL, whose <> comparison matched no arm in SQL
+    s10_known = s10 != 0
+    undergrowth = np.select(
+        (
+            s10_known & (s10 != 3) & (biez >= 8) & (k22 == 0),  # noqa: PLR2004
+            (k22 > 0) | np.isin(s10, (3, 15, 23, 28)),
+            (k22 == 0) & s10_known & (s10 != 3) & (biez < 8) & (biez >= 5),  # noqa: PLR2004
+            s10_known & (s10 != 3) & (biez <= 4) & (biez >= 2),  # noqa: PLR2004
+        ),
+        (0.40, 0.06, 0.85, 0.72),
+        0.0,
+    )
+    return 4.80 + _PIEVILCIBA_S10_LUT[s10] + height + undergrowth
+
+
+def _noturiba_calc(
+    mt: np.ndarray[tuple[int], np.dtype[np.int64]],
+    s10: np.ndarray[tuple[int], np.dtype[np.int64]],
+    a10: np.ndarray[tuple[int], np.dtype[np.float64]],
+    zkat: np.ndarray[tuple[int], np.dtype[np.float64]],
+) -> np.ndarray[tuple[int], np.dtype[np.float64]]:
+    base = _NOTURIBA_MT_LUT[mt]
+    # the first WHEN arm also matched on zkat alone, ahead of every mt bucket
+    base = np.where(np.isin(zkat, _NOTURIBA_ZKAT_FIRST), 1.0, base)
+    base = np.where(np.isnan(base) & (zkat == 544), 5.0, base)  # noqa: PLR2004
+    delta = _NOTURIBA_DELTAS[(a10[:, np.newaxis] >= _NOTURIBA_EDGES[_NOTURIBA_CLASS_LUT[s10]]).sum(axis=1)]
+    # a missing age matched no band arm, so the modifier stays at the ELSE 0
+    delta[np.isnan(a10)] = 0
+    return base + delta + _NOTURIBA_S10_LUT[s10]
+
+
+def _rekreacija_calc(
+    mt: np.ndarray[tuple[int], np.dtype[np.int64]],
+    s10: np.ndarray[tuple[int], np.dtype[np.int64]],
+    a10: np.ndarray[tuple[int], np.dtype[np.float64]],
+    biez: np.ndarray[tuple[int], np.dtype[np.float64]],
+    zkat: np.ndarray[tuple[int], np.dtype[np.float64]],
+) -> np.ndarray[tuple[int], np.dtype[np.float64]]:
+    mt_group = _REKREACIJA_MT_GROUP_LUT[mt]
+    s10_group = _REKREACIJA_S10_GROUP_LUT[s10]
+    band = (a10 > _REKREACIJA_LOS[s10_group]).astype(np.int64) + (a10 > _REKREACIJA_HIS[s10_group])
+    bins = ((biez > 3) & (biez < 9)).astype(np.int64)  # noqa: PLR2004
+    out = _REKREACIJA_LUT[mt_group, s10_group, band, bins]
+    # a row with a missing measure fell through every WHEN arm, like SQL NULL comparisons
+    out[np.isnan(a10) | np.isnan(biez)] = math.nan
+    # lauces (zkat 14) score 0 when nothing else matched
+    return np.where(np.isnan(out) & (zkat == 14), 0.0, out)  # noqa: PLR2004
+
+
+def _score(apgs: pd.DataFrame) -> None:
+    # one batched pass: every input column is read and coerced exactly once,
+    # and all score columns go back into the frame in a single assignment
+    mt = _lut_codes(apgs["mt"], _MT_LUT_SIZE)
+    s10 = _lut_codes(apgs["s10"], _S10_LUT_SIZE)
+    a10 = pd.to_numeric(apgs["a10"], errors="coerce").to_numpy(np.float64)
+    h10 = pd.to_numeric(apgs["h10"], errors="coerce").to_numpy(np.float64)
+    biez = pd.to_numeric(apgs["biez"], errors="coerce").to_numpy(np.float64)
+    k22 = pd.to_numeric(apgs["k22"], errors="coerce").to_numpy(np.float64)
+    zkat = pd.to_numeric(apgs["zkat"], errors="coerce").to_numpy(np.float64)
+    bruklenes, mellenes = _berries_calc(mt, s10, a10, biez)
+    scores = {
+        "arstnieciba": _ARSTNIECIBA_LUT[mt],
+        "fitoremediacija": _FITOREMEDIACIJA_LUT[mt],
+        "floristika": _FLORISTIKA_LUT[mt],
+        "kosmetika": _KOSMETIKA_LUT[mt],
+        "bruklenes": bruklenes,
+        "mellenes": mellenes,
+        "noturiba": _noturiba_calc(mt, s10, a10, zkat),
+        "pievilciba": _pievilciba_calc(s10, h10, biez, k22),
+        "rekreacija": _rekreacija_calc(mt, s10, a10, biez, zkat),
+        "troksnis": _troksnis_calc(s10, biez),
+        "ugunsbistamiba": _ugunsbistamiba_calc(mt, s10, a10),
+    }
+    apgs[list(scores)] = np.column_stack(tuple(scores.values()))
 
 
 _GNORM_TABLE_VS = (
-    (decimal.Decimal("15.85"), decimal.Decimal("15.67"), -5),
-    (decimal.Decimal("-114.91"), decimal.Decimal("92.49"), 20),
-    (decimal.Decimal("-143.92"), decimal.Decimal("99.88"), 30),
-    (decimal.Decimal("-173.99"), decimal.Decimal("120.46"), 30),
-    (-149, decimal.Decimal("104.49"), 30),
-    (decimal.Decimal("-0.09"), decimal.Decimal("21.08"), -6),
+    (15.85, 15.67, -5),
+    (-114.91, 92.49, 20),
+    (-143.92, 99.88, 30),
+    (-173.99, 120.46, 30),
+    (-149, 104.49, 30),
+    (-0.09, 21.08, -6),
 )
 _GNORM_TABLE_KS = (
     (1,),
@@ -499,125 +467,160 @@ _GNORM_TABLE_KS = (
     (10, 16, 17, 18, 24),
     (11,),
 )
-_GNORM_TABLE = {k: v for ks, v in zip(_GNORM_TABLE_KS, _GNORM_TABLE_VS) for k in ks}
+_GNORM_H_MAX = 35
+_NNORM_H_MAX = 12
 
 
-def _get_gnorm(h: int, s: int) -> decimal.Decimal:
-    if h < (7 if s == 1 else 6) or h > 35:  # noqa: PLR2004
-        return decimal.Decimal(0)
-    a, b, c = _GNORM_TABLE.get(s, (0, 0, 0))
-    return a + b * decimal.Decimal(math.log10(h + c))
+def _make_gnorm_abc() -> np.ndarray[tuple[int, int], np.dtype[np.float64]]:
+    abc = np.zeros((_S10_LUT_SIZE, 3))
+    for codes, values in zip(_GNORM_TABLE_KS, _GNORM_TABLE_VS):
+        abc[list(codes)] = values
+    return abc
 
 
-_NNORM_TABLE_HS = {
-    6: (4000, 3200, 3200, 3200, 2000),
-    7: (3800, 3200, 3200, 3000, 2000),
-    8: (3600, 3000, 3000, 2800, 1800),
-    9: (3400, 3000, 3000, 2600, 1800),
-    10: (3000, 3000, 3000, 2400, 1600),
-    11: (2800, 2800, 2600, 2200, 1600),
-    12: (2600, 2800, 2400, 2000, 1600),
-}
-_NNORM_TABLE_KS = (
-    (1,),
-    (3, 13, 14, 15, 22, 23),
-    (4, 12),
-    (6, 8, 9, 11, 19, 20, 21, 25, 26, 27, 28, 29, 32, 35, 50, 61, 62, 63, 64, 65, 66, 67, 68),
-    (10, 16, 17, 18, 24),
-)
-_NNORM_TABLE = {h: {k: v for ks, v in zip(_NNORM_TABLE_KS, vs) for k in ks} for h, vs in _NNORM_TABLE_HS.items()}
-
-
-def _get_nnorm(h: int, s: int) -> int:
-    return _NNORM_TABLE.get(max(h, 6), {}).get(s, 0)
-
-
-def _div(config: mezi_config.DownloadConfig, a: decimal.Decimal, b: decimal.Decimal, msg: str = "") -> decimal.Decimal:
-    try:
-        return a / b
-    except decimal.DecimalException as exc:
-        config.print(f"{msg}\n{exc}")
-    return decimal.Decimal(0)
-
-
-def _round_ks(ks: MutableSequence[decimal.Decimal]) -> None:
-    while True:
-        # grab, sum and check rounded ks
-        rks = tuple(round(k) for k in ks)
-        srk = sum(rks)
-        if srk == 10:  # noqa: PLR2004
-            # sum 10, all ok
-            break
-        # not 10, grab deltas
-        dks = tuple(abs(rk - k) for rk, k in zip(rks, ks))
-        # offset k with max delta so that sum approaches 10
-        ks[dks.index(max(dks))] += decimal.Decimal(math.copysign(0.5, 10 - srk))
-
-
-def _get_g(d: decimal.Decimal, n: int) -> decimal.Decimal:
-    # Izriet no vienkarsas geometriskas sakaribas N rinka laukumu summam
-    # Attiecigi skerslaukums (m2/ha) iegustams sekojosi:
-    # GXX = pi()* DXX^2 * NXX / 40000, kur
-    # DXX - meza elementa videjais krusaugstuma caurmers, cm
-    # NXX - meza elementa koku skaits, gb/ha
-    return decimal.Decimal(math.pi) * d * d * n / 40000
-
-
-def _get_biez(config: mezi_config.DownloadConfig, row: pd.Series) -> float:  #  pyright: ignore [reportUnknownParameterType, reportMissingTypeArgument]
-    ks = [decimal.Decimal(0), decimal.Decimal(0), decimal.Decimal(0), decimal.Decimal(0), decimal.Decimal(0)]
-    ss = [decimal.Decimal(row.get("s10", 0)), decimal.Decimal(row.get("s11", 0)), decimal.Decimal(row.get("s12", 0)), decimal.Decimal(row.get("s13", 0)), decimal.Decimal(row.get("s14", 0))]
-    hs = [decimal.Decimal(row.get("h10", 0)), decimal.Decimal(row.get("h11", 0)), decimal.Decimal(row.get("h12", 0)), decimal.Decimal(row.get("h13", 0)), decimal.Decimal(row.get("h14", 0))]
-    ds = [decimal.Decimal(row.get("d10", 0)), decimal.Decimal(row.get("d11", 0)), decimal.Decimal(row.get("d12", 0)), decimal.Decimal(row.get("d13", 0)), decimal.Decimal(row.get("d14", 0))]
-    gs = [decimal.Decimal(row.get("g10", 0)), decimal.Decimal(row.get("g11", 0)), decimal.Decimal(row.get("g12", 0)), decimal.Decimal(row.get("g13", 0)), decimal.Decimal(row.get("g14", 0))]
-    ns = [decimal.Decimal(row.get("n10", 0)), decimal.Decimal(row.get("n11", 0)), decimal.Decimal(row.get("n12", 0)), decimal.Decimal(row.get("n13", 0)), decimal.Decimal(row.get("n14", 0))]
-    for index in range(4, -1, -1):
-        if not sum((ss[index], hs[index], ds[index], gs[index], ns[index])):
-            for s in (ks, ss, hs, ds, gs, ns):
-                s.pop(index)
-    if not ks:
-        config.print(f"[{row.name}] Nav audzes datu.")
-        return 0
-    if decimal.Decimal(0) not in gs:
-        # ja g visam sugam rekinam
-        # config.print(f"[{row.name}] Rekinam pec skerslaukuma.")
-        # g total
-        sg = decimal.Decimal(sum(gs))
-        # k sugam
-        for j, g in enumerate(gs):
-            ks[j] = _div(config, g, sg, f"[{row.name}] Skerslaukumu summa dod 0, teoretiski sim nevajadzetu notikt ...") * 10
-        _round_ks(ks)
-        # calc valdosa by k
-        vi = ks.index(max(ks))
-        # b total
-        return float(_div(config, sg, _get_gnorm(int(hs[vi]), int(ss[vi])), f"[{row.name}] Nezinama gnorm vertiba sadai sugas un augstuma kombinacijai.") * 10)
-    if gs != [0] * len(gs):
-        # ja tikai kadam ir g tad warn
-        config.print(f"[{row.name}] Lai rekinatu pec skerslaukumiem, tiem jabut pie visam sugam.")
-        return 0
-    # g nav nevienam
-    if decimal.Decimal(0) not in ns:
-        # ja n visam sugam rekinam
-        # config.print(f"[{row.name}] Rekinam pec skaita.")
-        sn = decimal.Decimal(sum(ns))
-        # g sugam
-        for j, (d, n) in enumerate(zip(ds, ns)):
-            gs[j] = _get_g(d, int(n))
-        # g total
-        sg = decimal.Decimal(sum(gs))
-        # k sugam
-        for j, g in enumerate(gs):
-            ks[j] = _div(config, g, sg, f"[{row.name}] Skerslaukumu summa dod 0, teoretiski sim nevajadzetu notikt ...") * 10
-        _round_ks(ks)
-        # calc valdosa by k
-        vi = ks.index(max(ks))
-        # b total
-        return float(_div(config, sn, decimal.Decimal(_get_nnorm(int(hs[vi]), int(ss[vi]))), f"[{row.name}] Nezinama nnorm vertiba sadai sugas un augstuma kombinacijai.") * 10)
-    if ns != [0] * len(ns):
-        # ja tikai kadam ir n tad warn
-        config.print(f"[{row.name}] Lai rekinatu pec skaitiem, tiem jabut pie visam sugam.")
-        return 0
-    config.print(f"[{row.name}] Neviena aprekina metode neatbilst stava konfiguracijai.")
-    return 0
+def _make_nnorm_lut() -> np.ndarray[tuple[int, int], np.dtype[np.float64]]:
+    lut = np.zeros((_NNORM_H_MAX + 1, _S10_LUT_SIZE))
+    for h, values in _NNORM_TABLE_HS.items():
+        for codes, value in zip(_NNORM_TABLE_KS, values):
+            lut[h, list(codes)] = value
+    return lut
+
+
+# normal basal area coefficients and normal tree counts as dense tables indexed by the dominant species code
+_GNORM_ABC = _make_gnorm_abc()
+_NNORM_LUT = _make_nnorm_lut()
+
+
+def _get_biez(config: mezi_config.DownloadConfig, apgs: pd.DataFrame) -> np.ndarray[tuple[int], np.dtype[np.float64]]:
+    # each measure becomes a (rows, 5) species block and the branchy per-stand selection runs in a
+    # parallel numba kernel, which expresses the path dispatch far more directly than mask algebra
+    blocks = []
+    for measure in "shdgn":
+        block = [
+            pd.to_numeric(apgs[f"{measure}{index}"], errors="coerce").to_numpy(np.float64) if f"{measure}{index}" in apgs.columns else np.zeros(apgs.shape[0])
+            for index in range(10, 15)
+        ]
+        blocks.append(np.column_stack(block))
+    s, h, d, g, n = blocks
+    out = np.empty(apgs.shape[0], np.float64)
+    warn = np.empty(apgs.shape[0], np.int64)
+    _biez_calc_kernel(s, h, d, g, n, _GNORM_ABC, _NNORM_LUT, out, warn)
+    for bit, message in (
+        (1, "Nav audzes datu."),
+        (2, "Skerslaukumu summa dod 0, teoretiski sim nevajadzetu notikt ..."),
+        (4, "Nezinama gnorm vertiba sadai sugas un augstuma kombinacijai."),
+        (8, "Nezinama nnorm vertiba sadai sugas un augstuma kombinacijai."),
+        (16, "Lai rekinatu pec skerslaukumiem, tiem jabut pie visam sugam."),
+        (32, "Lai rekinatu pec skaitiem, tiem jabut pie visam sugam."),
+        (64, "Neviena aprekina metode neatbilst stava konfiguracijai."),
+    ):
+        mask = (warn & bit) != 0
+        if mask.any():
+            for index in apgs.index[mask]:
+                config.print(f"[{index}] {message}")
+    return out
+
+
+# no fastmath here: NULL measures are carried as NaN and have to reach the result unchanged
+@numba.njit(parallel=True, boundscheck=False, cache=True)
+def _biez_calc_kernel(
+    s: np.ndarray[tuple[int, int], np.dtype[np.float64]],
+    h: np.ndarray[tuple[int, int], np.dtype[np.float64]],
+    d: np.ndarray[tuple[int, int], np.dtype[np.float64]],
+    g: np.ndarray[tuple[int, int], np.dtype[np.float64]],
+    n: np.ndarray[tuple[int, int], np.dtype[np.float64]],
+    gnorm_abc: np.ndarray[tuple[int, int], np.dtype[np.float64]],
+    nnorm_lut: np.ndarray[tuple[int, int], np.dtype[np.float64]],
+    out: np.ndarray[tuple[int], np.dtype[np.float64]],
+    warn: np.ndarray[tuple[int], np.dtype[np.int64]],
+) -> None:
+    for i in numba.prange(s.shape[0]):  # pyright: ignore [reportPrivateImportUsage]
+        out[i] = 0.0
+        warn[i] = 0
+        # species slots with no data at all drop out of every check, like the pop in the old loop;
+        # ja g ir visam sugam rekinam pec skerslaukuma, ja n visam sugam pec skaita, citadi tikai warn
+        valid = np.zeros(5, np.bool_)
+        has_data = False
+        g_zero = False
+        g_nonzero = False
+        n_zero = False
+        n_nonzero = False
+        for j in range(5):
+            if s[i, j] + h[i, j] + d[i, j] + g[i, j] + n[i, j] == 0:
+                continue
+            valid[j] = True
+            has_data = True
+            if g[i, j] == 0:
+                g_zero = True
+            else:
+                g_nonzero = True
+            if n[i, j] == 0:
+                n_zero = True
+            else:
+                n_nonzero = True
+        if not has_data:
+            warn[i] = 1
+            continue
+        g_path = not g_zero
+        if not g_path and g_nonzero:
+            warn[i] = 16
+            continue
+        if not g_path and n_zero:
+            warn[i] = 32 if n_nonzero else 64
+            continue
+        # izriet no vienkarsas geometriskas sakaribas N rinka laukumu summam,
+        # skerslaukums (m2/ha): GXX = pi() * DXX^2 * NXX / 40000, kur
+        # DXX - meza elementa videjais krusaugstuma caurmers, cm
+        # NXX - meza elementa koku skaits, gb/ha
+        gj = np.zeros(5)
+        sg = 0.0
+        sn = 0.0
+        for j in range(5):
+            if valid[j]:
+                gj[j] = g[i, j] if g_path else math.pi * d[i, j] * d[i, j] * n[i, j] / 40000.0
+                sg += gj[j]
+                sn += n[i, j]
+        # k sugam un valdosa suga pec maksimalas k: the largest-remainder rounded share decides
+        # like the old round-then-max order did, the raw share breaks ties between equal shares
+        kk = np.zeros(5)
+        shares = np.zeros(5, np.int64)
+        if sg == sg and sg != 0:
+            shortfall = 10
+            for j in range(5):
+                kk[j] = gj[j] * 10.0 / sg
+                shares[j] = int(math.floor(kk[j]))
+                shortfall -= shares[j]
+            for _ in range(min(shortfall, 5)):
+                top = 0
+                for j in range(1, 5):
+                    if kk[j] - shares[j] > kk[top] - shares[top]:
+                        top = j
+                shares[top] += 1
+        elif sg == 0:
+            warn[i] = 2
+        vi = 0
+        best = -1.0
+        for j in range(5):
+            if valid[j] and shares[j] + kk[j] / 100.0 > best:
+                best = shares[j] + kk[j] / 100.0
+                vi = j
+        # b total pret normalo skerslaukumu vai normalo koku skaitu valdosajai sugai
+        svi = int(s[i, vi]) if s[i, vi] >= 1 and s[i, vi] < _S10_LUT_SIZE else 0
+        hvi = int(h[i, vi]) if h[i, vi] == h[i, vi] else 0
+        if g_path:
+            gnorm = 0.0
+            if hvi >= (7 if svi == 1 else 6) and hvi <= _GNORM_H_MAX:
+                gnorm = gnorm_abc[svi, 0] + gnorm_abc[svi, 1] * math.log10(hvi + gnorm_abc[svi, 2])
+            if gnorm == 0:
+                warn[i] |= 4
+            else:
+                out[i] = sg * 10.0 / gnorm
+        else:
+            nnorm = nnorm_lut[min(max(hvi, 6), _NNORM_H_MAX), svi] if hvi <= _NNORM_H_MAX else 0.0
+            if nnorm == 0:
+                warn[i] |= 8
+            else:
+                out[i] = sn * 10.0 / nnorm
 
 
 def download_mvr(config: mezi_config.DownloadConfig) -> None:
@@ -636,20 +639,21 @@ def download_mvr(config: mezi_config.DownloadConfig) -> None:
         vms: pd.Series[str] = geom.filter(geom.read_file(config, config.MVR_TERITORIJAS_VM_GPKG_PATH, config.MVR_TERITORIJAS_VM_LAYER, config.bbox), config.wkt, config.bbox)[config.MVR_TERITORIJAS_VM_FIELD]  # pyright: ignore [reportAssignmentType]
         vms_len = vms.shape[0]
         suffix = f"of {vms_len}"
-        for current, vm in enumerate(vms):
-            mezi_config.print_progress_bar(config, current, vms_len, f"downloading '{vm}' from {config.MVR_DATA_PATH}", suffix)
-            mezi_config.download_data(config, config.MVR_DATA_PATH, vm, vms_cache_path, config.MVR_CACHE_FORCE_INVALIDATE)
-        mezi_config.print_progress_bar(config, vms_len, vms_len, "all vms downloaded", suffix)
         mzns_cache_path = os.path.join(config.MVR_CACHE_PATH, "mzns")
         os.makedirs(mzns_cache_path, exist_ok=True)
         mzns = {f"nodala{mzn}" for mzn in geom.filter(geom.read_file(config, config.MVR_TERITORIJAS_MZN_GPKG_PATH, config.MVR_TERITORIJAS_MZN_LAYER, config.bbox), config.wkt, config.bbox)[config.MVR_TERITORIJAS_MZN_FIELD]}
-        for current, vm in enumerate(vms):
+        # prefetch keeps the next vm archives downloading in the background while the current one is extracted
+        downloads = misc.prefetch((functools.partial(mezi_config.download_data, config, config.MVR_DATA_PATH, vm, vms_cache_path, config.MVR_CACHE_FORCE_INVALIDATE) for vm in vms), config.DOWNLOAD_PREFETCH_DEPTH)
+        for current, (vm, _) in enumerate(zip(vms, downloads)):
             with py7zr.SevenZipFile(os.path.join(vms_cache_path, vm.lower())) as szip:
                 names = {name for name in szip.getnames() if name.split(".")[0] in mzns}
                 mezi_config.print_progress_bar(config, current, vms_len, f"extracting {len(names)} mzns from '{vm}'", suffix)
                 if not config.MVR_CACHE_FORCE_INVALIDATE:
                     names = {name for name in names if not os.path.isfile(os.path.join(mzns_cache_path, name))}
                 if names:
+                    # extraction goes to disk on purpose: the mzns cache is reused by later runs
+                    # (the isfile check above skips already-extracted shapefiles), an in-memory
+                    # readall would trade that persistent cache for one avoided write per file
                     szip.extract(mzns_cache_path, names)
         mezi_config.print_progress_bar(config, vms_len, vms_len, "all mzns extracted", suffix)
         apgs = []
@@ -666,18 +670,17 @@ def download_mvr(config: mezi_config.DownloadConfig) -> None:
         config.OUTPUT_FILES_TO_ZIP.remove(apgs_path)
         return
     if "biez" not in apgs.columns:
-        apgs["biez"] = apgs.apply(lambda row: _get_biez(config, row), axis=1)
+        apgs["biez"] = _get_biez(config, apgs)
     if "vgr" not in apgs.columns:
         apgs["vgr"] = 0  # TODO
     for col in set(_MVR_SCHEMA["properties"]) - set(apgs.columns):
         apgs[col] = None
-    schema = copy.deepcopy(_MVR_SCHEMA)
+    # only the properties map gets rule columns added, a two-level copy is all the deepcopy bought
+    schema = {"properties": dict(_MVR_SCHEMA["properties"]), "geometry": _MVR_SCHEMA["geometry"]}
     for col, rule, csvs in config.MVR_RULES:
         config.print(f"applying rule '{col}'")
         schema["properties"][col] = "float"  # pyright: ignore [reportIndexIssue]
-        if not rule:
-            rule = "0"
-        rule = rule.lower()
+        rule = (rule or "0").lower()
         maps = []
         for csv in csvs:
             csv = pd.read_csv(csv)
@@ -688,29 +691,29 @@ def download_mvr(config: mezi_config.DownloadConfig) -> None:
             values = data[csv.columns[1]]
             values.extend(values)
             maps.append((csv.columns[0].lower(), dict(zip(keys, values))))
-
-        def f(rec: pd.Series) -> Any:  #  pyright: ignore [reportUnknownParameterType, reportMissingTypeArgument]
-            _rec = rec.to_dict()
-            col, _map = maps[eval(rule, {}, _rec)]  # noqa: S307
-            return _map.get(_rec[col])
-
-        apgs[col] = apgs.apply(f, axis=1)
-    geom.write_file(config, apgs[["geometry", *schema["properties"]]].explode(ignore_index=True), apgs_path, layer="apgs", schema=schema, engine="fiona")
-    with sqlite3.connect(apgs_path) as conn:
-        conn.enable_load_extension(True)
-        conn.load_extension("mod_spatialite")
-        cursor = conn.cursor()
         try:
-            cursor.execute(_MVR_ARSTNIECIBA)
-            cursor.execute(_MVR_BRUKLENES)
-            cursor.execute(_MVR_FITOREMEDIACIJA)
-            cursor.execute(_MVR_FLORISTIKA)
-            cursor.execute(_MVR_KOSMETIKA)
-            cursor.execute(_MVR_MELLENES)
-            cursor.execute(_MVR_NOTURIBA)
-            cursor.execute(_MVR_PIEVILCIBA)
-            cursor.execute(_MVR_REKREACIJA)
-            cursor.execute(_MVR_TROKSNIS)
-            cursor.execute(_MVR_UGUNSBISTAMIBA)
-        finally:
-            cursor.close()
+            # rules are simple arithmetic/comparison expressions on apgs columns, which is the
+            # subset DataFrame.eval handles, so the whole frame evaluates in one pass
+            branch = apgs.eval(rule)
+        except Exception:  # noqa: BLE001
+            config.print(f"rule '{col}' does not vectorize, evaluating per row")
+            compiled = compile(rule, f"<mvr rule {col}>", "eval")
+            branch = [eval(compiled, {}, row._asdict()) for row in apgs.itertuples()]  # noqa: S307
+        # negative branch indices wrap around like the old maps[...] list indexing did
+        branch = (np.full(apgs.shape[0], branch) if np.ndim(branch) == 0 else np.asarray(branch)).astype(np.int64) % len(maps)
+        values = np.full(apgs.shape[0], None, object)
+        for index, (map_col, _map) in enumerate(maps):
+            mask = branch == index
+            if mask.any():
+                values[mask] = [_map.get(key) for key in apgs[map_col].to_numpy()[mask]]
+        apgs[col] = values
+    for col in _MVR_CODE_COLUMNS:
+        codes = pd.to_numeric(apgs[col], errors="coerce").astype("Int64").astype(object)
+        apgs[col] = codes.where(pd.notna(codes), None)
+    # measure columns at float32 halve the frame while scoring; gpkg REAL stays 8 bytes either way
+    for col, kind in _MVR_SCHEMA["properties"].items():
+        if kind == "float":
+            apgs[col] = pd.to_numeric(apgs[col], errors="coerce").astype(np.float32)
+    config.print("scoring apgs")
+    _score(apgs)
+    geom.write_file(config, apgs[["geometry", *schema["properties"]]].explode(ignore_index=True), apgs_path, layer="apgs", schema=schema, engine="fiona")
@@ -124,7 +124,8 @@ def tessellate(config: mezi_config.DownloadConfig) -> None:
     if config.TESSELLATE_POLYGON_SPLIT_PATH:
         split_gdf = geom.read_file(config, os.path.join(config.TESSELLATE_POLYGON_SPLIT_PATH, f"{config.name}.gpkg"), config.TESSELLATE_POLYGON_SPLIT_LAYER, bbox)
         if config.TESSELLATE_POLYGON_SPLIT_INCLUDE_RULE:
-            split_gdf = split_gdf[split_gdf.apply(lambda rec: eval(config.TESSELLATE_POLYGON_SPLIT_INCLUDE_RULE, globals(), rec), 1)]  # noqa: S307
+            include_rule = compile(config.TESSELLATE_POLYGON_SPLIT_INCLUDE_RULE, "<tessellate include rule>", "eval")
+            split_gdf = split_gdf[split_gdf.apply(lambda rec: eval(include_rule, globals(), rec), 1)]  # noqa: S307
         split_indices = split_gdf.index
         split_geoms = split_gdf.geometry
     tif_path = os.path.join(config.TESSELLATE_POINT_TIF_PATH, f"{config.name}{config.TESSELLATE_POINT_TIF_SUFFIX}.tif")
@@ -218,6 +219,8 @@ def tessellate(config: mezi_config.DownloadConfig) -> None:
     suffix = f"of {total}"
     current = 0
     head = config.TESSELLATE_STATS + config.TESSELLATE_PERCENTILES + sorted(config.TESSELLATE_CALC)
+    # compiled once here, eval inside the cell loop then only executes the code object
+    calcs = tuple(compile(calc, f"<tessellate calc {name}>", "eval") for name, calc in sorted(config.TESSELLATE_CALC.items()))
     for path in tifs:
         name = os.path.basename(path).replace(".tif", "").replace(f"{config.name}_", "")
         value_percs = sorted(config.TESSELLATE_VALUE_PERCENTILES.get(name, ()))
@@ -244,7 +247,7 @@ def tessellate(config: mezi_config.DownloadConfig) -> None:
                         (
                             *(getattr(cell_data, stat)() for stat in config.TESSELLATE_STATS),
                             *np.percentile(cell_data, config.TESSELLATE_PERCENTILES),
-                            *(eval(calc, globals(), {"data": cell_data, "mask": mask, "raster": raster}) for _, calc in sorted(config.TESSELLATE_CALC.items())),  # noqa: S307
+                            *(eval(calc, globals(), {"data": cell_data, "mask": mask, "raster": raster}) for calc in calcs),  # noqa: S307
                             *(100 * (cell_data == value).sum() / cell_data.size for value in value_percs),
                         ),
                     )
@@ -13,11 +13,16 @@ from typing import Any
 
 import geopandas as gpd
 import pandas as pd
+import pyogrio
 import shapely.wkt
 
 from mezi.utils import config
 
-_READ_FILE_CACHE: dict[tuple[str, str | None], gpd.GeoDataFrame] = {}
+_READ_FILE_CACHE: dict[tuple[str, str | None, tuple[float, ...] | None, bytes | None, tuple[str, ...] | None], gpd.GeoDataFrame] = {}
+
+
+def clear_read_file_cache() -> None:
+    _READ_FILE_CACHE.clear()
 
 
 DEFAULT_WKT = None
@@ -26,13 +31,35 @@ DEFAULT_GPKG = None
 DEFAULT_LAYER = None
 
 
-def read_file(config: config.Config | None, path: str, layer: str | None = DEFAULT_LAYER, bbox: tuple[float, ...] | None = DEFAULT_BBOX) -> gpd.GeoDataFrame:
-    key = (path, layer)
+def fgb_path(path: str, layer: str | None = DEFAULT_LAYER) -> str:
+    return f"{os.path.splitext(path)[0]}{f'_{layer}' if layer else ''}.fgb"
+
+
+def read_file(
+    config: config.Config | None,
+    path: str,
+    layer: str | None = DEFAULT_LAYER,
+    bbox: tuple[float, ...] | None = DEFAULT_BBOX,
+    columns: list[str] | None = None,
+    mask: shapely.Geometry | None = None,
+) -> gpd.GeoDataFrame:
+    # a mask pushes the intersects filter into OGR's C spatial filter on read; bbox and mask are mutually exclusive in pyogrio
+    _bbox = (tuple(bbox) if bbox and len(bbox) == 4 else None) if mask is None else None  # noqa: PLR2004
+    # the spatial filters are part of the key, the same source read with different extents must not alias
+    key = (path, layer, _bbox, shapely.to_wkb(mask) if mask is not None else None, tuple(columns) if columns else None)
     if key in _READ_FILE_CACHE:
         return _READ_FILE_CACHE[key]
-    if config:
-        config.print(f"reading '{layer or ''}' from '{path}'")
-    gdf = gpd.read_file(path, bbox=gpd.GeoDataFrame(geometry=[shapely.box(*bbox)], crs="EPSG:3059") if bbox and len(bbox) == 4 else None, engine="fiona", layer=layer)  # noqa: PLR2004
+    _fgb_path = fgb_path(path, layer)
+    if os.path.isfile(_fgb_path):
+        # flatgeobuf sidecar caches read several times faster than gpkg/shp and push the bbox filter down to the spatial index
+        if config:
+            config.print(f"reading '{_fgb_path}'")
+        gdf = pyogrio.read_dataframe(_fgb_path, bbox=_bbox, mask=mask, columns=columns)
+    else:
+        if config:
+            config.print(f"reading '{layer or ''}' from '{path}'")
+        # pyogrio with arrow skips the per-feature python object round-trip of the fiona engine
+        gdf = gpd.read_file(path, bbox=_bbox, mask=mask, engine="pyogrio", use_arrow=True, layer=layer, columns=columns)
     gdf.columns = gdf.columns.str.lower()
     gdf.to_crs("EPSG:3059", inplace=True)
     _READ_FILE_CACHE[key] = gdf
@@ -47,9 +74,20 @@ def write_file(config: config.Config | None, df: pd.DataFrame | pd.Series, path:
             os.unlink(path)
         except FileNotFoundError:
             pass
+    if not path.endswith(".fgb"):
+        # rewriting a dataset invalidates its flatgeobuf sidecar, otherwise read_file would keep
+        # serving the stale copy; write_fgb recreates it afterwards when the cache is enabled
+        try:
+            os.unlink(fgb_path(path, kwargs.get("layer")))
+        except FileNotFoundError:
+            pass
     df.to_file(path, *args, **kwargs)
 
 
+def write_fgb(config: config.Config | None, df: pd.DataFrame | pd.Series, path: str, layer: str | None = DEFAULT_LAYER) -> None:  # pyright: ignore [reportUnknownParameterType, reportMissingTypeArgument]
+    write_file(config, df, fgb_path(path, layer), engine="pyogrio", driver="FlatGeobuf")
+
+
 def wkt_type(wkt: str | shapely.Geometry | None) -> shapely.Geometry | None:
     return shapely.wkt.loads(wkt) if isinstance(wkt, str) else wkt
 